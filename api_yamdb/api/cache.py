@@ -0,0 +1,129 @@
+import logging
+import os
+from hashlib import md5
+from time import time, time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+logger = logging.getLogger(__name__)
+
+TITLES_CACHE_NAMESPACE = 'titles'
+CATEGORIES_CACHE_NAMESPACE = 'categories'
+GENRES_CACHE_NAMESPACE = 'genres'
+USERS_CACHE_NAMESPACE = 'users'
+REVIEWS_CACHE_NAMESPACE = 'reviews:{title_id}'
+COMMENTS_CACHE_NAMESPACE = 'comments:{review_id}'
+
+# Эпоха входит в ключи поколений: её смена сбрасывает все пространства
+# имён сразу.
+EPOCH_KEY = 'epoch'
+GENERATION_KEY = 'generation:{epoch}:{namespace}'
+MODIFIED_KEY = 'modified:{epoch}:{namespace}'
+RESPONSE_KEY = 'response:{namespace}:{generation}:{digest}'
+
+
+class GenerationsFileCache(FileBasedCache):
+    """Файловый кэш без вытеснения: потеря поколения или эпохи сбросила
+    бы ответы, а подсчёт файлов каталога при каждой записи стоит
+    O(числа ключей). Ключей не больше, чем пространств имён."""
+
+    def _cull(self):
+        pass
+
+
+def get_generations_cache():
+    """Кэш поколений, общий для всех процессов приложения."""
+    return caches[settings.GENERATIONS_CACHE_ALIAS]
+
+
+def new_generation():
+    """Значение поколения, не совпадающее с прежними ни в одном
+    процессе."""
+    return f'{time_ns()}-{os.getpid()}'
+
+
+def get_epoch(generations):
+    """Эпоха ключей поколений. Её отсутствие - явное событие: кэш
+    поколений пуст или очищен, и ответы всех пространств имён
+    сбрасываются новой эпохой."""
+    epoch = generations.get(EPOCH_KEY)
+    if epoch is None:
+        if generations.add(EPOCH_KEY, new_generation(), timeout=None):
+            logger.warning(
+                'Эпоха кэша поколений не найдена, начата новая: '
+                'закэшированные ответы и ETag сброшены'
+            )
+        epoch = generations.get(EPOCH_KEY)
+    return epoch
+
+
+def get_generation(namespace):
+    """Возвращает текущее поколение данных пространства имён кэша."""
+    generations = get_generations_cache()
+    epoch = get_epoch(generations)
+    key = GENERATION_KEY.format(epoch=epoch, namespace=namespace)
+    generation = generations.get(key)
+    if generation is None:
+        generations.add(key, new_generation(), timeout=None)
+        generations.add(
+            MODIFIED_KEY.format(epoch=epoch, namespace=namespace), time(),
+            timeout=None
+        )
+        generation = generations.get(key)
+    return generation
+
+
+def bump_generation(namespace):
+    """Делает недействительными все закэшированные ответы пространства
+    имён, не перебирая их ключи.
+
+    Поколение заменяется новым значением, а не увеличивается: у общего
+    кэша incr не атомарен, и одновременные записи могли бы получить
+    одинаковое поколение."""
+    generations = get_generations_cache()
+    epoch = get_epoch(generations)
+    generations.set_many({
+        GENERATION_KEY.format(epoch=epoch, namespace=namespace): (
+            new_generation()
+        ),
+        MODIFIED_KEY.format(epoch=epoch, namespace=namespace): time(),
+    }, timeout=None)
+
+
+def bump_all_generations():
+    """Делает недействительными ответы всех пространств имён одной
+    записью, например после массовой загрузки данных."""
+    get_generations_cache().set(EPOCH_KEY, new_generation(), timeout=None)
+
+
+def get_last_modified(namespaces):
+    """Возвращает время последнего изменения данных пространств имён
+    или None, если оно неизвестно."""
+    generations = get_generations_cache()
+    epoch = get_epoch(generations)
+    keys = [
+        MODIFIED_KEY.format(epoch=epoch, namespace=name)
+        for name in namespaces
+    ]
+    modified = generations.get_many(keys)
+    if len(modified) != len(keys):
+        return None
+    return max(modified.values())
+
+
+def get_response_key(namespace, request):
+    """Строит ключ ответа по хосту, пути и упорядоченным параметрам
+    запроса."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    raw_key = f'{request.get_host()}{request.path}?{params}'
+    return RESPONSE_KEY.format(
+        namespace=namespace,
+        generation=get_generation(namespace),
+        digest=md5(raw_key.encode()).hexdigest()
+    )
@@ -1,18 +1,42 @@
 from django_filters import FilterSet, filters
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+from reviews.search import search_titles
 
 
-class TitleFilterSet(FilterSet):
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='contains'
-    )
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='contains'
+def get_ids_by_slugs(model, value):
+    """Одним запросом находит id объектов по слагам, перечисленным
+    через запятую."""
+    slugs = {slug.strip() for slug in value.split(',') if slug.strip()}
+    return list(
+        model.objects.filter(slug__in=slugs).values_list('id', flat=True)
     )
 
+
+class TitleFilterSet(FilterSet):
+    genre = filters.CharFilter(method='filter_genre')
+    category = filters.CharFilter(method='filter_category')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    search = filters.CharFilter(method='filter_search')
+
     class Meta:
         model = Title
         fields = ('name', 'year', 'genre', 'category')
+
+    def filter_genre(self, queryset, name, value):
+        """Произведения хотя бы с одним из жанров, без дублей строк."""
+        genre_ids = get_ids_by_slugs(Genre, value)
+        return queryset.filter(
+            id__in=Title.genre.through.objects.filter(
+                genre_id__in=genre_ids
+            ).values('title_id')
+        )
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(
+            category_id__in=get_ids_by_slugs(Category, value)
+        )
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
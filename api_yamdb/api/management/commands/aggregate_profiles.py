@@ -0,0 +1,69 @@
+import os
+import pstats
+from glob import glob
+from io import StringIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+
+class Command(BaseCommand):
+    help = (
+        'Объединяет собранные ProfilingMiddleware профили по '
+        'представлениям и выводит самые затратные функции'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'views',
+            nargs='*',
+            help='Представления, например TitleViewSet.list; по умолчанию все'
+        )
+        parser.add_argument(
+            '--profile-dir',
+            default=settings.PROFILING_DIR,
+            help='Каталог с профилями'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Количество функций в отчёте по представлению'
+        )
+        parser.add_argument(
+            '--sort',
+            choices=SORT_KEYS,
+            default=SORT_KEYS[0],
+            help='Порядок сортировки функций'
+        )
+
+    def handle(self, *args, **options):
+        profile_dir = options['profile_dir']
+        views = options['views']
+        if not views and os.path.isdir(profile_dir):
+            views = sorted(
+                name for name in os.listdir(profile_dir)
+                if os.path.isdir(os.path.join(profile_dir, name))
+            )
+        if not views:
+            raise CommandError(f'В {profile_dir} нет собранных профилей')
+        for view in views:
+            paths = sorted(glob(os.path.join(profile_dir, view, '*.prof')))
+            if not paths:
+                raise CommandError(f'Нет профилей представления {view}')
+            output = StringIO()
+            stats = pstats.Stats(*paths, stream=output)
+            # Объединённый профиль открывается snakeviz, gprof2dot или
+            # flameprof так же, как отдельный.
+            merged_path = os.path.join(profile_dir, f'{view}.prof')
+            stats.dump_stats(merged_path)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(
+                options['limit']
+            )
+            self.stdout.write(
+                f'{view}: профилей {len(paths)}, объединённый профиль '
+                f'{merged_path}'
+            )
+            self.stdout.write(output.getvalue())
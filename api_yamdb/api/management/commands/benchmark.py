@@ -0,0 +1,274 @@
+import json
+import os
+import tracemalloc
+from datetime import datetime
+from statistics import quantiles
+from time import perf_counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from reviews.enums import UserRoles
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+API_URL = '/api/v1/'
+
+PERCENTILES = {'p50_ms': 50, 'p95_ms': 95, 'p99_ms': 99}
+
+DEFAULT_THRESHOLD = 10
+
+
+def get_clients():
+    """Анонимный клиент, пользователь и администратор; созданные
+    пользователи удаляются при откате транзакции бенчмарка."""
+    user = User.objects.create(
+        username='benchmark_user', email='benchmark_user@yamdb.fake',
+        confirmation_code='benchmark'
+    )
+    admin = User.objects.create(
+        username='benchmark_admin', email='benchmark_admin@yamdb.fake',
+        role=UserRoles.admin.name
+    )
+    clients = {'anonymous': APIClient()}
+    for kind, account in (('user', user), ('admin', admin)):
+        clients[kind] = APIClient()
+        clients[kind].force_authenticate(account)
+    return clients, user
+
+
+def get_scenarios(user):
+    """Запросы ко всем маршрутам api/urls.py: (имя, клиент, метод, url,
+    функция данных запроса по номеру итерации)."""
+    title = (
+        Title.objects.annotate(total=Count('reviews'))
+        .order_by('-total', 'id').first()
+    )
+    review = (
+        Review.objects.filter(title=title).annotate(total=Count('comments'))
+        .order_by('-total', 'id').first()
+    )
+    if title is None or review is None:
+        raise CommandError(
+            'Нет данных для бенчмарка: заполните базу командой '
+            'generate_dataset'
+        )
+    comment = review.comments.order_by('id').first()
+    genre = Genre.objects.order_by('id').first()
+    category = Category.objects.order_by('id').first()
+    titles_url = f'{API_URL}titles/'
+    reviews_url = f'{titles_url}{title.id}/reviews/'
+    comments_url = f'{reviews_url}{review.id}/comments/'
+    scenarios = [
+        ('categories_list', 'anonymous', 'get', f'{API_URL}categories/'),
+        ('genres_list', 'anonymous', 'get', f'{API_URL}genres/'),
+        ('titles_list_cached', 'anonymous', 'get', titles_url),
+        ('titles_list', 'user', 'get', titles_url),
+        ('titles_list_deep_offset', 'user', 'get',
+         f'{titles_url}?offset={Title.objects.count() // 2}'),
+        ('titles_list_cursor', 'user', 'get', f'{titles_url}?cursor='),
+        ('titles_filter', 'user', 'get', titles_url + '?' + urlencode({
+            'genre': getattr(genre, 'slug', ''),
+            'category': getattr(category, 'slug', ''),
+            'year_min': title.year - 20,
+            'year_max': title.year + 20,
+        })),
+        ('titles_search', 'user', 'get',
+         titles_url + '?' + urlencode({'search': title.name.split()[0]})),
+        ('titles_facets', 'user', 'get', f'{titles_url}facets/'),
+        ('title_detail', 'user', 'get', f'{titles_url}{title.id}/'),
+        ('reviews_list', 'anonymous', 'get', reviews_url),
+        ('reviews_list_cursor', 'anonymous', 'get', f'{reviews_url}?cursor='),
+        ('review_detail', 'anonymous', 'get', f'{reviews_url}{review.id}/'),
+        ('comments_list', 'anonymous', 'get', comments_url),
+        ('users_list', 'admin', 'get', f'{API_URL}users/'),
+        ('users_search', 'admin', 'get', f'{API_URL}users/?search=user'),
+        ('user_detail', 'admin', 'get', f'{API_URL}users/{user.username}/'),
+        ('users_me', 'user', 'get', f'{API_URL}users/me/'),
+    ]
+    scenarios = [scenario + (None,) for scenario in scenarios]
+    if comment:
+        scenarios.append((
+            'comment_detail', 'anonymous', 'get',
+            f'{comments_url}{comment.id}/', None
+        ))
+    scenarios += [
+        ('auth_signup', 'anonymous', 'post', f'{API_URL}auth/signup/',
+         lambda index: {
+             'username': f'benchmark_{index}',
+             'email': f'benchmark_{index}@yamdb.fake',
+         }),
+        ('auth_token', 'anonymous', 'post', f'{API_URL}auth/token/',
+         lambda index: {
+             'username': user.username, 'confirmation_code': 'benchmark',
+         }),
+    ]
+    return scenarios
+
+
+def measure(client, method, url, get_data, iterations, warmup):
+    """Время ответа по итерациям, затем отдельным запросом под
+    tracemalloc - число SQL-запросов и пик выделенной памяти."""
+    def request(index):
+        return getattr(client, method)(
+            url, get_data(index) if get_data else None
+        )
+
+    timings = []
+    for index in range(warmup + iterations):
+        started = perf_counter()
+        request(index)
+        if index >= warmup:
+            timings.append((perf_counter() - started) * 1000)
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        response = request(warmup + iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if response.status_code >= 400:
+        raise CommandError(
+            f'{method.upper()} {url} вернул статус {response.status_code}'
+        )
+    cuts = quantiles(timings, n=100, method='inclusive')
+    result = {
+        name: round(cuts[percentile - 1], 3)
+        for name, percentile in PERCENTILES.items()
+    }
+    result.update(queries=len(queries), alloc_kb=round(peak / 1024, 1))
+    return result
+
+
+def compare(previous, current, threshold):
+    """Строки отчёта об изменениях и признак регрессии: p95 вырос
+    больше чем на threshold процентов или выросло число запросов."""
+    lines, regressed = [], False
+    for name, result in current.items():
+        old = previous.get(name)
+        if old is None:
+            lines.append(f'{name}: новый сценарий')
+            continue
+        change = (result['p95_ms'] - old['p95_ms']) / max(old['p95_ms'], 1e-9)
+        slower = change * 100 > threshold
+        more_queries = result['queries'] > old['queries']
+        regressed = regressed or slower or more_queries
+        marker = 'РЕГРЕССИЯ ' if slower or more_queries else ''
+        lines.append(
+            f'{marker}{name}: p95 {old["p95_ms"]} -> {result["p95_ms"]} мс '
+            f'({change:+.0%}), запросов {old["queries"]} -> '
+            f'{result["queries"]}, память {old["alloc_kb"]} -> '
+            f'{result["alloc_kb"]} КБ'
+        )
+    return lines, regressed
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, число SQL-запросов и память для маршрутов API '
+        'и сравнивает их с сохранённым базовым замером'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--baseline',
+            default=settings.BENCHMARK_BASELINE,
+            help='JSON-файл базового замера'
+        )
+        parser.add_argument(
+            '--no-save',
+            action='store_true',
+            help='Не перезаписывать базовый замер'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help='Допустимый рост p95 в процентах'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Завершиться с ошибкой при регрессии'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Запустить только указанные сценарии'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 2 or options['warmup'] < 0:
+            raise CommandError(
+                '--iterations должен быть не меньше 2, --warmup - '
+                'неотрицательным'
+            )
+        results = self.run(options)
+        self.stdout.write(
+            f'{"сценарий":<26}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"запросов":>10}{"КБ":>9}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<26}{result["p50_ms"]:>9}{result["p95_ms"]:>9}'
+                f'{result["p99_ms"]:>9}{result["queries"]:>10}'
+                f'{result["alloc_kb"]:>9}'
+            )
+        regressed = self.report_changes(results, options)
+        if not options['no_save']:
+            self.save(results, options['baseline'])
+        if regressed and options['fail_on_regression']:
+            raise CommandError('Обнаружена регрессия производительности')
+
+    def run(self, options):
+        """Все запросы выполняются в транзакции, которая откатывается,
+        поэтому бенчмарк не меняет данные."""
+        results = {}
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+        ), transaction.atomic():
+            clients, user = get_clients()
+            for name, kind, method, url, get_data in get_scenarios(user):
+                if options['only'] and name not in options['only']:
+                    continue
+                results[name] = measure(
+                    clients[kind], method, url, get_data,
+                    options['iterations'], options['warmup']
+                )
+            transaction.set_rollback(True)
+        cache.clear()
+        return results
+
+    def report_changes(self, results, options):
+        try:
+            with open(options['baseline'], encoding='utf-8') as f:
+                previous = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write('Базовый замер не найден, сравнение пропущено')
+            return False
+        self.stdout.write(f'Сравнение с замером от {previous["created"]}:')
+        lines, regressed = compare(
+            previous['results'], results, options['threshold']
+        )
+        for line in lines:
+            self.stdout.write(line)
+        return regressed
+
+    def save(self, results, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        baseline = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'dataset': {
+                model._meta.model_name: model.objects.count()
+                for model in (User, Title, Review, Comment)
+            },
+            'results': results,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Базовый замер сохранён в {path}')
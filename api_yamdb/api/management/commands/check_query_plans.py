@@ -0,0 +1,152 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from api.middleware import record_queries
+from reviews.models import Review, Title, User
+
+API_URL = '/api/v1/'
+
+# Полный просмотр таблицы: `SCAN t` без `USING INDEX`, в старых
+# версиях SQLite - `SCAN TABLE t`.
+FULL_SCAN_REGEX = r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$'
+
+TEMP_BTREE = 'USE TEMP B-TREE'
+
+# prefetch_related выбирает строки только для объектов страницы, поэтому
+# их сортировка во временном B-дереве не зависит от размера таблицы.
+PREFETCH_MARKER = '_prefetch_related_val_'
+
+
+class SelectRecorder:
+    """Обёртка выполнения SQL, запоминающая SELECT-запросы с
+    параметрами."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def find_problems(sql, plan):
+    """Шаги плана с полным просмотром таблицы или временным B-деревом
+    для сортировки."""
+    return [
+        step for step in plan
+        if re.match(FULL_SCAN_REGEX, step)
+        or (TEMP_BTREE in step and PREFETCH_MARKER not in sql)
+    ]
+
+
+def get_routes():
+    """GET-запросы вложенных списков и объектов: (имя, url)."""
+    title = (
+        Title.objects.filter(reviews__isnull=False).order_by('id').first()
+        or Title.objects.order_by('id').first()
+    )
+    title_id = getattr(title, 'id', 0)
+    review = (
+        Review.objects.filter(title_id=title_id, comments__isnull=False)
+        .order_by('id').first()
+        or Review.objects.filter(title_id=title_id).order_by('id').first()
+    )
+    review_id = getattr(review, 'id', 0)
+    comment = review.comments.order_by('id').first() if review else None
+    titles_url = f'{API_URL}titles/'
+    reviews_url = f'{titles_url}{title_id}/reviews/'
+    comments_url = f'{reviews_url}{review_id}/comments/'
+    return [
+        ('titles_list', titles_url),
+        ('titles_list_cursor', f'{titles_url}?cursor='),
+        ('titles_detail', f'{titles_url}{title_id}/'),
+        ('reviews_list', reviews_url),
+        ('reviews_list_cursor', f'{reviews_url}?cursor='),
+        ('reviews_detail', f'{reviews_url}{review_id}/'),
+        ('comments_list', comments_url),
+        ('comments_list_cursor', f'{comments_url}?cursor='),
+        ('comments_detail',
+         f'{comments_url}{getattr(comment, "id", 0)}/'),
+    ]
+
+
+def get_lookups():
+    """Запросы ORM вне вьюсетов: (имя, queryset)."""
+    review = Review.objects.order_by('id').first()
+    author_id = getattr(review, 'author_id', 0)
+    title_id = getattr(review, 'title_id', 0)
+    return [
+        ('review_unique_lookup',
+         Review.objects.filter(author_id=author_id, title_id=title_id)),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет EXPLAIN QUERY PLAN запросов вложенных списков и '
+        'объектов: ни один не должен просматривать таблицу целиком или '
+        'сортировать во временном B-дереве'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Вывести планы всех запросов'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Проверка планов поддерживается только для SQLite'
+            )
+        queries = self.get_route_queries() + [
+            (name, *queryset.query.sql_with_params())
+            for name, queryset in get_lookups()
+        ]
+        failures = 0
+        for name, sql, params in queries:
+            plan = explain(sql, params)
+            problems = find_problems(sql, plan)
+            failures += bool(problems)
+            if problems or options['show_plans']:
+                self.stdout.write(f'{name}: {sql}')
+                for step in plan:
+                    self.stdout.write(f'    {step}')
+            if problems:
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: {"; ".join(problems)}'
+                ))
+        if failures:
+            raise CommandError(
+                f'Запросов без подходящего индекса: {failures} из '
+                f'{len(queries)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено запросов: {len(queries)}, все используют индексы'
+        ))
+
+    def get_route_queries(self):
+        """SELECT-запросы обработки маршрутов. Пользователь не сохраняется
+        в базе, поэтому команда ничего не изменяет, а ответы не берутся
+        из кэша анонимных запросов."""
+        client = APIClient()
+        client.force_authenticate(User(username='query_plans'))
+        queries = []
+        for name, url in get_routes():
+            recorder = SelectRecorder()
+            with record_queries(recorder):
+                client.get(url)
+            queries.extend((name, sql, params)
+                           for sql, params in recorder.queries)
+        return queries
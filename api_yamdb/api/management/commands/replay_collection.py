@@ -0,0 +1,349 @@
+import json
+import re
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from statistics import quantiles
+from time import perf_counter
+from urllib.parse import quote, urlsplit
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.middleware import get_view_stats, reset_view_stats
+from reviews.enums import UserRoles
+from reviews.models import User
+
+VARIABLE_REGEX = re.compile(r'{{(\w+)}}')
+
+# Тестовые скрипты коллекции сохраняют поля ответа в переменные:
+# const slug = _.get(responseData, "slug"); ...
+# pm.collectionVariables.set("adminCategory", slug);
+LOCAL_REGEX = re.compile(
+    r'(?:const|let|var) (\w+) = _\.get\(responseData, ["\'](\w+)["\']\)'
+)
+SET_REGEX = re.compile(r'collectionVariables\.set\("(\w+)", (\w+)\)')
+EXPECTED_STATUS_REGEX = re.compile(r'\.to\.be\.eql\("([^"]+)"\)')
+
+STATUS_BY_PHRASE = {status.phrase: status.value for status in HTTPStatus}
+
+CONFIRMATION_CODE_SUFFIX = 'ConfirmationCode'
+
+# Пользователи, которых создаёт postman_collection/set_up_data.sh.
+STAFF_USERS = (
+    ('superuser', {'is_superuser': True, 'is_staff': True}),
+    ('admin', {'role': UserRoles.admin.name}),
+    ('moderator', {'role': UserRoles.moderator.name}),
+)
+
+# Значения этих полей уникальны, поэтому у каждого виртуального
+# пользователя они свои.
+UNIQUE_FIELDS = ('username', 'email', 'slug')
+
+UNIQUE_VALUE_REGEX = re.compile(r'[-\w]+')
+
+Step = namedtuple(
+    'Step', 'name method path token body expected_status extract'
+)
+
+
+def get_steps(items, parent_auth=None):
+    """Разворачивает папки коллекции в список запросов в порядке
+    выполнения; запрос без своей авторизации наследует её от папки."""
+    for item in items:
+        if 'item' in item:
+            yield from get_steps(
+                item['item'], item.get('auth') or parent_auth
+            )
+            continue
+        request = item['request']
+        script = '\n'.join(
+            line for event in item.get('event', ())
+            if event['listen'] == 'test'
+            for line in event['script']['exec']
+        )
+        fields = dict(LOCAL_REGEX.findall(script))
+        expected = EXPECTED_STATUS_REGEX.search(script)
+        auth = request.get('auth') or parent_auth or {}
+        token = next(
+            (param['value'] for param in auth.get('bearer', ())
+             if param['key'] == 'token'),
+            None
+        )
+        url = urlsplit(request['url']['raw'])
+        yield Step(
+            name=item['name'],
+            method=request['method'],
+            path=url.path + (f'?{url.query}' if url.query else ''),
+            token=token,
+            body=(request.get('body') or {}).get('raw') or None,
+            expected_status=(
+                STATUS_BY_PHRASE.get(expected.group(1)) if expected else None
+            ),
+            extract=tuple(
+                (variable, fields[local])
+                for variable, local in SET_REGEX.findall(script)
+                if local in fields
+            ),
+        )
+
+
+def quote_url_value(value):
+    return quote(value, safe='')
+
+
+def make_unique(key, value, suffix):
+    """Добавляет суффикс виртуального пользователя к корректному
+    значению уникального поля; заведомо некорректные значения
+    остаются как есть, чтобы запрос вернул ту же ошибку."""
+    if not isinstance(value, str) or '{{' in value:
+        return value
+    if key == 'email':
+        local, _, domain = value.partition('@')
+        if local and domain:
+            return f'{local}-{suffix}@{domain}'
+        return value
+    if UNIQUE_VALUE_REGEX.fullmatch(value) and value != 'me':
+        return f'{value}-{suffix}'
+    return value
+
+
+def make_body_unique(body, suffix):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict):
+        return body
+    return json.dumps({
+        key: make_unique(key, value, suffix) if key in UNIQUE_FIELDS
+        else value
+        for key, value in data.items()
+    }, ensure_ascii=False)
+
+
+class VirtualUser:
+    """Проходит коллекцию со своими переменными, как запуск коллекции
+    в Postman."""
+
+    def __init__(self, collection, steps, suffix, base_url):
+        self.steps = steps
+        self.suffix = suffix
+        self.base_url = base_url
+        self.variables = {
+            variable['key']: variable['value']
+            for variable in collection.get('variable', ())
+        }
+        for key, value in self.variables.items():
+            if key.endswith('Username'):
+                self.variables[key] = make_unique('username', value, suffix)
+            elif key.endswith('Email'):
+                self.variables[key] = make_unique('email', value, suffix)
+
+    def create_staff(self):
+        """Создаёт суперпользователя, администратора и модератора так же,
+        как set_up_data.sh."""
+        for prefix, attributes in STAFF_USERS:
+            user, _ = User.objects.get_or_create(
+                username=self.variables[f'{prefix}Username'],
+                defaults={'email': self.variables[f'{prefix}Email']}
+            )
+            for attribute, value in attributes.items():
+                setattr(user, attribute, value)
+            user.save()
+
+    def resolve(self, name):
+        """Код подтверждения пользователь берёт из письма, здесь он
+        читается из базы по email пользователя."""
+        if name.endswith(CONFIRMATION_CODE_SUFFIX):
+            email = self.variables.get(
+                f'{name[:-len(CONFIRMATION_CODE_SUFFIX)]}Email'
+            )
+            code = User.objects.filter(email=email).values_list(
+                'confirmation_code', flat=True
+            ).first()
+            return code or ''
+        return str(self.variables.get(name, ''))
+
+    def substitute(self, text, escape=str):
+        return VARIABLE_REGEX.sub(
+            lambda match: escape(self.resolve(match.group(1))), text
+        )
+
+    def send(self, step):
+        path = self.substitute(step.path, quote_url_value)
+        body = step.body and self.substitute(
+            make_body_unique(step.body, self.suffix)
+        )
+        authorization = step.token and f'Bearer {self.substitute(step.token)}'
+        if self.base_url:
+            import requests
+
+            headers = {'Content-Type': 'application/json'}
+            if authorization:
+                headers['Authorization'] = authorization
+            response = requests.request(
+                step.method, f'{self.base_url}{path}',
+                data=body and body.encode(), headers=headers
+            )
+            return response.status_code, response.content
+        extra = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+        response = self.client.generic(
+            step.method, path, body or '', 'application/json', **extra
+        )
+        return response.status_code, response.content
+
+    def run(self, iterations):
+        """Возвращает (имя запроса, задержка в мс, статус совпал)."""
+        # Ошибка сервера учитывается как ответ со статусом 500, как у
+        # настоящего клиента, а не прерывает прогон.
+        self.client = Client(raise_request_exception=False)
+        results = []
+        try:
+            for _ in range(iterations):
+                for step in self.steps:
+                    started = perf_counter()
+                    status, content = self.send(step)
+                    elapsed = (perf_counter() - started) * 1000
+                    results.append((
+                        step.name, elapsed,
+                        step.expected_status in (None, status)
+                    ))
+                    self.extract(step, content)
+        finally:
+            connection.close()
+        return results
+
+    def extract(self, step, content):
+        if not step.extract:
+            return
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        for variable, field in step.extract:
+            if data.get(field):
+                self.variables[variable] = data[field]
+
+
+class Command(BaseCommand):
+    help = (
+        'Воспроизводит Postman-коллекцию несколькими виртуальными '
+        'пользователями и выводит задержки по запросам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--collection',
+            default=settings.POSTMAN_COLLECTION,
+            help='Файл Postman-коллекции'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1,
+            help='Количество одновременных виртуальных пользователей'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=1,
+            help='Сколько раз каждый пользователь проходит коллекцию'
+        )
+        parser.add_argument(
+            '--base-url',
+            help='Адрес запущенного сервера; по умолчанию запросы '
+                 'обрабатываются в процессе, без сети'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('users', 'iterations'):
+            if options[option] < 1:
+                raise CommandError(f'--{option} должен быть положительным')
+        with open(options['collection'], encoding='utf-8') as f:
+            collection = json.load(f)
+        steps = list(get_steps(collection['item']))
+        run_id = uuid4().hex[:6]
+        virtual_users = [
+            VirtualUser(
+                collection, steps, f'{run_id}-{index}',
+                (options['base_url'] or '').rstrip('/')
+            )
+            for index in range(options['users'])
+        ]
+        for virtual_user in virtual_users:
+            virtual_user.create_staff()
+        workers = options['users']
+        if workers > 1 and not options['base_url'] and (
+            connection.vendor == 'sqlite' and connection.is_in_memory_db()
+        ):
+            self.stderr.write(
+                'База данных SQLite в памяти не поддерживает одновременную '
+                'запись, пользователи пройдут коллекцию последовательно.'
+            )
+            workers = 1
+        reset_view_stats()
+        started = perf_counter()
+        with override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+        ), ThreadPoolExecutor(workers) as executor:
+            runs = list(executor.map(
+                lambda virtual_user: virtual_user.run(options['iterations']),
+                virtual_users
+            ))
+        self.report(runs, perf_counter() - started)
+        if not options['base_url']:
+            self.report_views(get_view_stats())
+
+    def report(self, runs, elapsed):
+        timings, mismatches = defaultdict(list), defaultdict(int)
+        for results in runs:
+            for name, timing, matched in results:
+                timings[name].append(timing)
+                mismatches[name] += not matched
+        total = sum(len(values) for values in timings.values())
+        self.stdout.write(
+            f'{"запрос":<60}{"n":>6}{"p50":>9}{"p95":>9}{"max":>9}'
+            f'{"ошибок":>8}'
+        )
+        for name, values in timings.items():
+            cuts = (
+                quantiles(values, n=100, method='inclusive')
+                if len(values) > 1 else values * 99
+            )
+            self.stdout.write(
+                f'{name[:59]:<60}{len(values):>6}{cuts[49]:>9.2f}'
+                f'{cuts[94]:>9.2f}{max(values):>9.2f}{mismatches[name]:>8}'
+            )
+        self.stdout.write(
+            f'Всего запросов: {total} за {elapsed:.2f} с '
+            f'({total / max(elapsed, 1e-9):.0f} запросов/с), '
+            f'неожиданных статусов: {sum(mismatches.values())}'
+        )
+
+    def report_views(self, view_stats):
+        """Представления в порядке убывания среднего числа SQL-запросов;
+        статистику собирает QueryTimingMiddleware."""
+        if not view_stats:
+            return
+        self.stdout.write(
+            f'{"представление":<44}{"n":>6}{"SQL/запрос":>12}'
+            f'{"макс. SQL":>11}{"мс в базе":>11}'
+        )
+        for view, stats in sorted(
+            view_stats.items(),
+            key=lambda item: item[1]['queries'] / item[1]['requests'],
+            reverse=True
+        ):
+            self.stdout.write(
+                f'{view[:43]:<44}{stats["requests"]:>6}'
+                f'{stats["queries"] / stats["requests"]:>12.1f}'
+                f'{stats["max_queries"]:>11}'
+                f'{stats["db_ms"] / stats["requests"]:>11.2f}'
+            )
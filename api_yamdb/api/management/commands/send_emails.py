@@ -0,0 +1,148 @@
+from datetime import timedelta
+from smtplib import SMTPException
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import metrics
+from reviews.models import OutgoingEmail
+
+
+def get_due_emails(max_attempts):
+    return OutgoingEmail.objects.filter(
+        send_after__lte=timezone.now(), attempts__lt=max_attempts
+    )
+
+
+def claim_batch(batch_size, max_attempts):
+    """Забирает пачку писем, которым пора уходить, и откладывает их на
+    EMAIL_OUTBOX_LEASE секунд, чтобы другие экземпляры команды их не
+    взяли. Если процесс упадёт при отправке, письма вернутся в очередь.
+
+    SQLite не поддерживает SELECT ... FOR UPDATE, поэтому письмо
+    захватывается условным UPDATE: срок аренды ставится, только если
+    письмо ещё не забрал другой экземпляр. Своими считаются письма с
+    выставленным этим вызовом сроком."""
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+    candidates = list(
+        get_due_emails(max_attempts).values_list('pk', flat=True)[:batch_size]
+    )
+    if not candidates or not OutgoingEmail.objects.filter(
+        pk__in=candidates, send_after__lte=now
+    ).update(send_after=lease):
+        return []
+    return list(
+        OutgoingEmail.objects.filter(pk__in=candidates, send_after=lease)
+    )
+
+
+def send_batch(emails):
+    """Отправляет пачку через одно соединение с почтовым сервером;
+    возвращает отправленные письма и ошибки неотправленных."""
+    sent, failed = [], []
+    connection = get_connection()
+    try:
+        connection.open()
+    except (SMTPException, OSError) as error:
+        return sent, [(email, error) for email in emails]
+    try:
+        for email in emails:
+            started = perf_counter()
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.message,
+                from_email=settings.EMAIL_SENDER,
+                to=[email.recipient],
+                connection=connection
+            )
+            try:
+                message.send()
+            except (SMTPException, OSError) as error:
+                failed.append((email, error))
+                continue
+            metrics.observe(
+                metrics.EMAIL_LATENCY, {}, perf_counter() - started
+            )
+            sent.append(email)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def reschedule(failed, max_attempts):
+    """Откладывает письма с ошибкой с удвоением задержки; после
+    max_attempts попыток письмо остаётся в таблице для разбора."""
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = str(error)
+        email.send_after = timezone.now() + timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+            * 2 ** (email.attempts - 1)
+        )
+    OutgoingEmail.objects.bulk_update(
+        [email for email, _ in failed],
+        ['attempts', 'last_error', 'send_after']
+    )
+    return sum(email.attempts >= max_attempts for email, _ in failed)
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение с '
+        'почтовым сервером, повторяя неудачные отправки с задержкой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем на одно соединение'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help='Количество попыток отправки письма'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах, когда в очереди нет писем к отправке'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить письма, которым пора уходить, и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        max_attempts = options['max_attempts']
+        while True:
+            emails = claim_batch(options['batch_size'], max_attempts)
+            if emails:
+                sent, failed = send_batch(emails)
+                OutgoingEmail.objects.filter(
+                    pk__in=[email.pk for email in sent]
+                ).delete()
+                abandoned = reschedule(failed, max_attempts)
+                self.report(len(sent), len(failed), abandoned, max_attempts)
+                continue
+            if options['once']:
+                self.report(0, 0, 0, max_attempts)
+                return
+            sleep(options['interval'])
+
+    def report(self, sent, failed, abandoned, max_attempts):
+        pending = OutgoingEmail.objects.filter(
+            attempts__lt=max_attempts
+        ).count()
+        self.stdout.write(
+            f'Отправлено: {sent}, ошибок: {failed}, исчерпали попытки: '
+            f'{abandoned}, в очереди: {pending}'
+        )
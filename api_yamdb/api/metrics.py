@@ -0,0 +1,224 @@
+import atexit
+import fcntl
+import json
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from glob import glob
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Значения завершившихся процессов: без них счётчики уменьшались бы при
+# перезапуске процесса, и Prometheus считал бы это сбросом счётчика.
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = 'archive.lock'
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+HTTP_REQUESTS = 'yamdb_http_requests_total'
+HTTP_LATENCY = 'yamdb_http_request_duration_seconds'
+DB_QUERIES = 'yamdb_db_queries_total'
+CACHE_REQUESTS = 'yamdb_response_cache_requests_total'
+EMAIL_LATENCY = 'yamdb_email_send_duration_seconds'
+
+# Имя: (тип, описание).
+METRICS = {
+    HTTP_REQUESTS: (
+        'counter', 'Запросы по маршруту, методу и статусу ответа'
+    ),
+    HTTP_LATENCY: ('histogram', 'Время обработки запроса по маршруту'),
+    DB_QUERIES: ('counter', 'SQL-запросы при обработке запросов маршрута'),
+    CACHE_REQUESTS: (
+        'counter', 'Обращения к кэшу ответов: result=hit|miss'
+    ),
+    EMAIL_LATENCY: ('histogram', 'Время отправки письма'),
+}
+
+_lock = Lock()
+_values = defaultdict(float)
+_state = {'pid': None, 'flushed': 0.0}
+
+
+def _ensure_process():
+    """После fork потомок начинает счёт с нуля: накопленное до fork
+    уже записано в файл родительского процесса."""
+    pid = os.getpid()
+    if _state['pid'] != pid:
+        _values.clear()
+        _state.update(pid=pid, flushed=0.0)
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())])
+
+
+def inc(name, labels, value=1):
+    with _lock:
+        _ensure_process()
+        _values[_key(name, labels)] += value
+    _maybe_flush()
+
+
+def observe(name, labels, value):
+    """Добавляет наблюдение в гистограмму с границами LATENCY_BUCKETS."""
+    with _lock:
+        _ensure_process()
+        for bucket in LATENCY_BUCKETS[bisect_left(LATENCY_BUCKETS, value):]:
+            _values[_key(f'{name}_bucket', {**labels, 'le': bucket})] += 1
+        _values[_key(f'{name}_bucket', {**labels, 'le': '+Inf'})] += 1
+        _values[_key(f'{name}_sum', labels)] += value
+        _values[_key(f'{name}_count', labels)] += 1
+    _maybe_flush()
+
+
+def _get_process_path():
+    return os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+
+
+def flush():
+    """Записывает значения процесса в METRICS_DIR, откуда их читает
+    процесс, обслуживающий /metrics."""
+    if not settings.METRICS_DIR:
+        return
+    with _lock:
+        _ensure_process()
+        data = dict(_values)
+        _state['flushed'] = monotonic()
+    path = _get_process_path()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+@contextmanager
+def _archive_lock():
+    """Блокировка каталога метрик между процессами на время переноса
+    значений в архив и суммирования."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIR, LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_values(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _archive(path):
+    """Прибавляет значения файла процесса к архиву и удаляет файл;
+    вызывается под _archive_lock."""
+    archive_path = os.path.join(settings.METRICS_DIR, ARCHIVE_FILE)
+    archive = _read_values(archive_path)
+    for key, value in _read_values(path).items():
+        archive[key] = archive.get(key, 0) + value
+    with open(f'{archive_path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(archive, f)
+    os.replace(f'{archive_path}.tmp', archive_path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@atexit.register
+def archive_process_file():
+    """Переносит значения завершающегося процесса в архив."""
+    if not (settings.configured and settings.METRICS_DIR and _state['pid']):
+        return
+    flush()
+    with _archive_lock():
+        _archive(_get_process_path())
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _maybe_flush():
+    if (
+        settings.METRICS_DIR
+        and monotonic() - _state['flushed'] > settings.METRICS_FLUSH_INTERVAL
+    ):
+        flush()
+
+
+def collect():
+    """Суммирует значения работающих процессов и архив завершившихся;
+    без METRICS_DIR - только текущего процесса."""
+    if not settings.METRICS_DIR:
+        with _lock:
+            _ensure_process()
+            return dict(_values)
+    flush()
+    totals = defaultdict(float)
+    with _archive_lock():
+        for path in glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            pid = os.path.basename(path)[:-len('.json')]
+            if pid.isdigit() and not is_alive(int(pid)):
+                # Процесс завершился аварийно и не перенёс значения сам.
+                _archive(path)
+        for path in glob(os.path.join(settings.METRICS_DIR, '*.json')):
+            for key, value in _read_values(path).items():
+                totals[key] += value
+    return totals
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render():
+    """Текстовый формат Prometheus 0.0.4."""
+    samples = defaultdict(list)
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        base = name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                base = name[:-len(suffix)]
+        samples[base].append((name, labels, value))
+    lines = []
+    for base, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {base} {description}')
+        lines.append(f'# TYPE {base} {kind}')
+        for name, labels, value in sorted(
+            samples[base], key=lambda sample: sample_order(*sample)
+        ):
+            lines.append(f'{name}{format_labels(labels)} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def sample_order(name, labels, value):
+    """Корзины гистограммы идут по возрастанию границы, +Inf - последней."""
+    le = dict(labels).get('le')
+    bound = float('inf') if le in (None, '+Inf') else float(le)
+    return (
+        [label for label in labels if label[0] != 'le'], name, bound
+    )
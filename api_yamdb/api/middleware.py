@@ -0,0 +1,194 @@
+import cProfile
+import logging
+import os
+import random
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from threading import Lock
+from time import perf_counter, time_ns
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api import metrics
+
+logger = logging.getLogger(__name__)
+
+_view_stats = defaultdict(
+    lambda: {'requests': 0, 'queries': 0, 'db_ms': 0.0, 'max_queries': 0}
+)
+_view_stats_lock = Lock()
+
+
+def get_view_name(request):
+    """Имя обработчика запроса, для вьюсетов - `TitleViewSet.list`."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match._func_path
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def get_route_name(request):
+    """Имя маршрута, например `titles-list`, или его шаблон."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.route
+
+
+def get_profile_dir(view):
+    return os.path.join(settings.PROFILING_DIR, view)
+
+
+def get_view_stats():
+    """Накопленные с запуска процесса число запросов к представлению,
+    число SQL-запросов и время в базе."""
+    with _view_stats_lock:
+        return {view: dict(stats) for view, stats in _view_stats.items()}
+
+
+def reset_view_stats():
+    with _view_stats_lock:
+        _view_stats.clear()
+
+
+class QueryRecorder:
+    """Обёртка выполнения SQL: считает запросы, их суммарное время
+    и запоминает самый медленный."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = (0.0, '')
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (perf_counter() - started) * 1000
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest[0]:
+                self.slowest = (duration, sql)
+
+
+@contextmanager
+def record_queries(recorder):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+class QueryTimingMiddleware:
+    """Добавляет к ответу заголовки Server-Timing и X-DB-Queries,
+    пишет в журнал медленные запросы и собирает статистику по
+    представлениям. Включается настройкой DB_TIMING_ENABLED."""
+
+    def __init__(self, get_response):
+        if not settings.DB_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with record_queries(QueryRecorder()) as recorder:
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(recorder.count)
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration:.1f};desc="{recorder.count} queries"'
+        )
+        view = get_view_name(request)
+        with _view_stats_lock:
+            stats = _view_stats[view]
+            stats['requests'] += 1
+            stats['queries'] += recorder.count
+            stats['db_ms'] += recorder.duration
+            stats['max_queries'] = max(stats['max_queries'], recorder.count)
+        if (
+            recorder.count > settings.DB_TIMING_SLOW_QUERIES
+            or recorder.duration > settings.DB_TIMING_SLOW_MS
+        ):
+            logger.warning(
+                '%s %s (%s): %d SQL-запросов, %.1f мс в базе; самый '
+                'медленный (%.1f мс): %s',
+                request.method, request.get_full_path(), view,
+                recorder.count, recorder.duration, *recorder.slowest
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует cProfile запрос администратора с заголовком
+    X-Profile или случайную долю PROFILING_SAMPLE_RATE запросов и
+    сохраняет .prof-файл в каталог PROFILING_DIR/<представление>/."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # В этом потоке уже работает другой профилировщик.
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        path = os.path.join(
+            get_profile_dir(get_view_name(request)), f'{time_ns()}.prof'
+        )
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+        response['X-Profile'] = os.path.relpath(path, settings.PROFILING_DIR)
+        return response
+
+    def should_profile(self, request):
+        if request.headers.get('X-Profile'):
+            try:
+                authenticated = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            return bool(authenticated) and authenticated[0].is_admin
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class MetricsMiddleware:
+    """Считает запросы, время ответа и SQL-запросы по маршрутам для
+    /metrics. Включается настройкой METRICS_ENABLED."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = perf_counter()
+        with record_queries(QueryRecorder()) as recorder:
+            response = self.get_response(request)
+        duration = perf_counter() - started
+        route = get_route_name(request)
+        labels = {'route': route, 'method': request.method}
+        metrics.inc(
+            metrics.HTTP_REQUESTS, {**labels, 'status': response.status_code}
+        )
+        metrics.observe(metrics.HTTP_LATENCY, labels, duration)
+        metrics.inc(metrics.DB_QUERIES, {'route': route}, recorder.count)
+        # Иначе последние значения простаивающего процесса не попали бы
+        # в METRICS_DIR.
+        metrics.flush()
+        return response
@@ -1,5 +1,16 @@
-from rest_framework import filters, mixins, viewsets
+from hashlib import md5
+from time import time
 
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.response import Response
+
+from api import metrics
+from api.cache import get_generation, get_last_modified, get_response_key
 from api.permissions import IsAdminOrReadOnly
 
 
@@ -15,3 +26,138 @@ class CreateDestroyViewset(
     search_fields = ('name', 'slug')
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
+
+
+class CachedAnonymousReadMixin:
+    """Кэширует ответы на GET-запросы анонимных пользователей.
+
+    Ключ ответа включает поколение `cache_namespace`, поэтому запись
+    в связанные модели делает устаревшими сразу все ответы.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        key = get_response_key(self.cache_namespace, request)
+        data = cache.get(key)
+        metrics.inc(metrics.CACHE_REQUESTS, {
+            'namespace': self.cache_namespace,
+            'result': 'miss' if data is None else 'hit',
+        })
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT
+            )
+        return response
+
+
+class ConditionalListMixin:
+    """Добавляет к ответам на GET-запросы списка ETag и Last-Modified.
+
+    Валидаторы строятся по общим для всех процессов поколениям коллекций
+    из `version_namespaces` (шаблоны дополняются kwargs запроса), поэтому
+    ответ 304 отдаётся без обращения к базе данных и сериализатору.
+    """
+
+    version_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_version_namespaces(self):
+        return [
+            namespace.format(**self.kwargs)
+            for namespace in self.version_namespaces
+        ]
+
+    def get_etag(self, request, namespaces):
+        versions = [get_generation(namespace) for namespace in namespaces]
+        raw_etag = (
+            f'{versions}:{request.get_full_path()}:'
+            f'{request.accepted_renderer.format}'
+        )
+        return quote_etag(md5(raw_etag.encode()).hexdigest())
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        namespaces = self.get_version_namespaces()
+        etag = self.get_etag(request, namespaces)
+        last_modified = get_last_modified(namespaces)
+        # HTTP-дата точна до секунды: пока секунда последнего изменения не
+        # закончилась, запись в ту же секунду не изменит Last-Modified, и
+        # ответ проверяется только по ETag.
+        if last_modified is not None and int(last_modified) < int(time()):
+            last_modified = int(last_modified)
+        else:
+            last_modified = None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """ETag и Last-Modified для списка и отдельного объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class NestedViewSetMixin:
+    """Вьюсет вложенного маршрута.
+
+    Объекты фильтруются по id родителей из URL (`parent_lookups`: поле
+    модели - параметр URL) одним запросом, без загрузки родителя. Родитель
+    `parent_model` ищется по `parent_model_lookups` (поле родителя -
+    параметр URL) не больше одного раза за запрос: при создании объекта и
+    для ответа 404, если страница списка пуста.
+    """
+
+    parent_lookups = {}
+    parent_model = None
+    parent_model_lookups = {}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(self.parent_model, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in self.parent_model_lookups.items()
+            })
+        return self._parent
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**{
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookups.items()
+        })
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.get_parent()
+        return page
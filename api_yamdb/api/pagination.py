@@ -0,0 +1,134 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """Пагинация limit/offset с опциональным режимом курсора.
+
+    Если вьюсет задаёт `cursor_ordering`, а запрос содержит параметр
+    `cursor` (для первой страницы - пустой), страница выбирается по
+    ключу сортировки последней записи без COUNT(*) и OFFSET. Поля
+    `cursor_ordering` не должны допускать NULL, последнее из них
+    должно быть уникальным.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'cursor_ordering', None)
+        self.cursor_mode = (
+            self.ordering is not None
+            and self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.offset_query_param
+        )
+        position, reverse = self.decode_cursor(queryset.model, request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, position))
+
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if not results:
+            self.has_next = self.has_previous = False
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def keyset_filter(ordering, position):
+        """Условие «строго после позиции» для составного ключа сортировки."""
+        condition = Q()
+        for idx, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                previous.lstrip('-'): position[previous.lstrip('-')]
+                for previous in ordering[:idx]
+            }
+            condition |= Q(**equal, **{f'{name}__{lookup}': position[name]})
+        return condition
+
+    def encode_cursor(self, obj, reverse):
+        tokens = [
+            ('p', obj._meta.get_field(field.lstrip('-')).value_to_string(obj))
+            for field in self.ordering
+        ]
+        if reverse:
+            tokens.append(('r', '1'))
+        encoded = b64encode(parse.urlencode(tokens).encode('ascii'))
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode('ascii')
+        )
+
+    def decode_cursor(self, model, request):
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None, False
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            values = tokens['p']
+            reverse = tokens.get('r', ['0'])[0] == '1'
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = {}
+            for field, value in zip(self.ordering, values):
+                name = field.lstrip('-')
+                position[name] = model._meta.get_field(name).to_python(value)
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
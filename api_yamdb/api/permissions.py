@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
 
@@ -32,3 +33,15 @@ class IsAdminOrOwnerOrReadOnly(BasePermission):
             or request.user.is_moderator
             or obj.author == request.user
         )
+
+
+class IsAdminOrMetricsAllowedIP(BasePermission):
+    """Для администраторов и адресов из настройки METRICS_ALLOWED_IPS,
+    с которых метрики собирает Prometheus."""
+
+    def has_permission(self, request, view):
+        return (
+            request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+            or request.user.is_authenticated
+            and request.user.is_admin
+        )
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
-
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
+from api.utils import get_confirmation_code
 from api.validators import username_validator
 from reviews.constants import (MAX_LENGTH_EMAIL, MAX_LENGTH_USERNAME,
                                NON_VALID_USERNAME)
@@ -26,25 +29,61 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
+class SlugsRelatedField(serializers.ManyRelatedField):
+    """Находит объекты по всем слагам списка одним запросом, а не
+    отдельным запросом на каждый слаг."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        slugs = [str(slug) for slug in data]
+        found = {
+            getattr(obj, child.slug_field): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': slugs}
+            )
+        }
+        for slug in slugs:
+            if slug not in found:
+                child.fail(
+                    'does_not_exist', slug_name=child.slug_field, value=slug
+                )
+        return [found[slug] for slug in slugs]
+
+
 class TitleGetSerializer(serializers.ModelSerializer):
     """Сериализатор объекта произведений только для GET-запросов."""
 
     genre = GenreSerializer(many=True, required=True)
     category = CategorySerializer(required=True)
     rating = serializers.IntegerField(read_only=True, default=None)
+    # Число оценок совпадает с числом отзывов: у отзыва одна оценка.
+    reviews_count = serializers.IntegerField(
+        source='rating_count', read_only=True
+    )
 
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'rating', 'reviews_count',
+                  'description', 'genre', 'category')
         model = Title
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Загружает категорию и жанры списка фиксированным числом
+        запросов."""
+        return queryset.select_related('category').prefetch_related('genre')
+
 
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор объекта произведений."""
 
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Genre.objects.all(),
-        many=True,
+    genre = SlugsRelatedField(
+        child_relation=serializers.SlugRelatedField(
+            slug_field='slug', queryset=Genre.objects.all()
+        ),
         allow_empty=False
     )
     category = serializers.SlugRelatedField(
@@ -59,6 +98,10 @@ class TitleSerializer(serializers.ModelSerializer):
     def to_representation(self, value):
         return TitleGetSerializer(value).data
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return TitleGetSerializer.setup_eager_loading(queryset)
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор объекта отзывов."""
@@ -69,20 +112,31 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = ('id', 'author', 'text', 'score', 'pub_date')
+        fields = ('id', 'author', 'text', 'score', 'pub_date',
+                  'comments_count')
         model = Review
 
-    def validate(self, data):
-        """Запрещает повторный отзыв тем же пользователем."""
-        if not self.context.get('request').method == 'POST':
-            return data
-        author = self.context.get('request').user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        if Review.objects.filter(author=author, title=title_id).exists():
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Загружает авторов отзывов в том же запросе."""
+        return queryset.select_related('author')
+
+    def create(self, validated_data):
+        """Повторный отзыв того же пользователя отклоняет ограничение
+        unique_title_review_, в том числе при одновременных запросах."""
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # Остальные нарушения, например удалённое произведение, -
+            # не повторный отзыв.
+            if not Review.objects.filter(
+                author=validated_data['author'], title=validated_data['title']
+            ).exists():
+                raise
             raise serializers.ValidationError(
-                'Отзыв уже оставлен'
+                {api_settings.NON_FIELD_ERRORS_KEY: ['Отзыв уже оставлен']}
             )
-        return data
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -97,6 +151,17 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'author', 'text', 'pub_date')
         model = Comment
 
+    def create(self, validated_data):
+        """Комментарий и счётчик комментариев отзыва сохраняются в одной
+        транзакции."""
+        with transaction.atomic():
+            return super().create(validated_data)
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Загружает авторов комментариев в том же запросе."""
+        return queryset.select_related('author')
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор объекта пользователя."""
@@ -137,28 +202,45 @@ class SignupSerializer(serializers.ModelSerializer):
         fields = ('username', 'email')
 
     def create(self, validated_data):
-        user, created = User.objects.get_or_create(
-            username=validated_data['username'],
-            email=validated_data['email']
+        """Создаёт пользователя с новым кодом подтверждения или меняет код
+        найденного при валидации одним UPDATE."""
+        confirmation_code = get_confirmation_code()
+        if self.user is None:
+            try:
+                with transaction.atomic():
+                    return User.objects.create(
+                        **validated_data, confirmation_code=confirmation_code
+                    )
+            except IntegrityError:
+                # Пользователь создан параллельным запросом.
+                self.user = self.get_user(validated_data)
+        User.objects.filter(pk=self.user.pk).update(
+            confirmation_code=confirmation_code
         )
-        return user
+        self.user.confirmation_code = confirmation_code
+        return self.user
 
     def validate(self, data):
-        user = User.objects.filter(
-            username=data.get('username'),
-            email=data.get('email')
-        )
-        if user.exists():
-            return data
-        if User.objects.filter(username=data.get('username')).exists():
+        self.user = self.get_user(data)
+        return data
+
+    def get_user(self, data):
+        """Ищет пользователя с этими username и email одним запросом;
+        возвращает None для нового пользователя."""
+        username, email = data.get('username'), data.get('email')
+        users = User.objects.filter(Q(username=username) | Q(email=email))
+        for user in users:
+            if (user.username, user.email) == (username, email):
+                return user
+        if any(user.username == username for user in users):
             raise serializers.ValidationError(
                 'Пользователь с таким username уже существует'
             )
-        if User.objects.filter(email=data.get('email')).exists():
+        if users:
             raise serializers.ValidationError(
                 'Пользователь с таким email уже существует'
             )
-        return data
+        return None
 
     def validate_username(self, value):
         if value == NON_VALID_USERNAME:
@@ -0,0 +1,88 @@
+from threading import local
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import (CATEGORIES_CACHE_NAMESPACE, COMMENTS_CACHE_NAMESPACE,
+                       GENRES_CACHE_NAMESPACE, REVIEWS_CACHE_NAMESPACE,
+                       TITLES_CACHE_NAMESPACE, USERS_CACHE_NAMESPACE,
+                       bump_generation)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+REVIEW_IDS_BATCH_SIZE = 500
+
+# Отзывы изменённых в текущей транзакции комментариев; после отката
+# сбрасываются при следующей фиксации, что безопасно.
+_pending = local()
+
+
+def invalidate(namespace, **kwargs):
+    """Увеличивает версию коллекции после фиксации транзакции."""
+    namespace = namespace.format(**kwargs)
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+def invalidate_titles_cache(sender, **kwargs):
+    invalidate(TITLES_CACHE_NAMESPACE)
+
+
+for model in (Title, Genre, Category, Review):
+    post_save.connect(invalidate_titles_cache, sender=model)
+    post_delete.connect(invalidate_titles_cache, sender=model)
+m2m_changed.connect(invalidate_titles_cache, sender=Title.genre.through)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_categories_cache(sender, **kwargs):
+    invalidate(CATEGORIES_CACHE_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def invalidate_genres_cache(sender, **kwargs):
+    invalidate(GENRES_CACHE_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_reviews_cache(sender, instance, **kwargs):
+    invalidate(REVIEWS_CACHE_NAMESPACE, title_id=instance.title_id)
+
+
+def invalidate_review_titles(review_id):
+    """Отзывы в ответах содержат число комментариев. Произведения отзывов
+    изменённых комментариев находятся одним запросом при фиксации
+    транзакции: каскадное удаление отзыва или пользователя удаляет
+    комментарии по одному, и загрузка отзыва каждого из них стоила бы
+    запроса на комментарий."""
+    _pending.__dict__.setdefault('review_ids', set()).add(review_id)
+    transaction.on_commit(flush_review_titles)
+
+
+def flush_review_titles():
+    """Отзывы, удалённые вместе с комментариями, уже не найдутся: списки
+    их произведений сбрасывает сигнал удаления самого отзыва."""
+    review_ids = list(_pending.__dict__.pop('review_ids', ()))
+    for start in range(0, len(review_ids), REVIEW_IDS_BATCH_SIZE):
+        title_ids = (
+            Review.objects
+            .filter(pk__in=review_ids[start:start + REVIEW_IDS_BATCH_SIZE])
+            .order_by()
+            .values_list('title_id', flat=True)
+            .distinct()
+        )
+        for title_id in title_ids:
+            bump_generation(REVIEWS_CACHE_NAMESPACE.format(title_id=title_id))
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comments_cache(sender, instance, **kwargs):
+    invalidate(COMMENTS_CACHE_NAMESPACE, review_id=instance.review_id)
+    if Comment.review.is_cached(instance):
+        invalidate(REVIEWS_CACHE_NAMESPACE, title_id=instance.review.title_id)
+    else:
+        invalidate_review_titles(instance.review_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_users_cache(sender, **kwargs):
+    invalidate(USERS_CACHE_NAMESPACE)
@@ -1,18 +1,17 @@
 from uuid import uuid4
 
-from django.core.mail import send_mail
+from reviews.models import OutgoingEmail
 
-from api_yamdb.settings import EMAIL_SENDER
-from reviews.models import User
 
+def get_confirmation_code():
+    return str(uuid4()).split('-')[0]
 
-def get_user_and_send_mail(username):
-    user = User.objects.get(username=username)
-    user.confirmation_code = str(uuid4()).split('-')[0]
-    user.save()
-    send_mail(
+
+def queue_confirmation_mail(user):
+    """Ставит письмо с кодом подтверждения в очередь send_emails;
+    вызывается в транзакции регистрации."""
+    OutgoingEmail.objects.create(
+        recipient=user.email,
         subject='Код подтверждения',
-        message=f'Ваш код: {user.confirmation_code}',
-        from_email=EMAIL_SENDER,
-        recipient_list=[user.email]
+        message=f'Ваш код: {user.confirmation_code}'
     )
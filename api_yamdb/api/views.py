@@ -1,6 +1,10 @@
 
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.db import transaction
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
@@ -8,89 +12,137 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken
 
+from api import metrics
+from api.cache import (CATEGORIES_CACHE_NAMESPACE, COMMENTS_CACHE_NAMESPACE,
+                       GENRES_CACHE_NAMESPACE, REVIEWS_CACHE_NAMESPACE,
+                       TITLES_CACHE_NAMESPACE, USERS_CACHE_NAMESPACE)
 from api.filters import TitleFilterSet
-from api.mixins import CreateDestroyViewset
-from api.permissions import (IsAdmin, IsAdminOrOwnerOrReadOnly,
-                             IsAdminOrReadOnly)
+from api.mixins import (CachedAnonymousReadMixin, ConditionalGetMixin,
+                        ConditionalListMixin, CreateDestroyViewset,
+                        NestedViewSetMixin)
+from api.permissions import (IsAdmin, IsAdminOrMetricsAllowedIP,
+                             IsAdminOrOwnerOrReadOnly, IsAdminOrReadOnly)
 from api.serializers import (CategorySerializer, CommentSerializer,
                              GenreSerializer, ReviewSerializer,
                              SignupSerializer, TitleGetSerializer,
                              TitleSerializer, TokenSerializer, UserSerializer)
-from api.utils import get_user_and_send_mail
-from reviews.models import Category, Genre, Review, Title
+from api.utils import queue_confirmation_mail
+from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
 
 
-class CategoryViewSet(CreateDestroyViewset):
+class CategoryViewSet(ConditionalListMixin, CreateDestroyViewset):
     """Вьюсет для модели Category."""
 
+    version_namespaces = (CATEGORIES_CACHE_NAMESPACE,)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
 
-class GenreViewSet(CreateDestroyViewset):
+class GenreViewSet(ConditionalListMixin, CreateDestroyViewset):
     """Вьюсет для модели Genre."""
 
+    version_namespaces = (GENRES_CACHE_NAMESPACE,)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, CachedAnonymousReadMixin,
+                   viewsets.ModelViewSet):
     """Вьюсет для модели Title."""
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+    cache_namespace = TITLES_CACHE_NAMESPACE
+    version_namespaces = (TITLES_CACHE_NAMESPACE,)
+    queryset = Title.objects.order_by('name')
+    cursor_ordering = ('-year', 'name', 'id')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdminOrReadOnly)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilterSet
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'destroy':
+            return queryset
+        return self.get_serializer_class().setup_eager_loading(queryset)
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return TitleGetSerializer
         return TitleSerializer
 
+    @action(detail=False, url_path='facets', methods=['get'])
+    def facets(self, request):
+        return self.get_conditional_response(
+            partial(self.get_cached_response, self.get_facets), request
+        )
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_facets(self, request):
+        """Количество отфильтрованных произведений по жанрам, категориям
+        и десятилетиям."""
+        facets = {'genre': [], 'category': [], 'decade': []}
+        queryset = self.filter_queryset(Title.objects.all())
+        for row in queryset.facet_counts():
+            if row['facet'] == 'decade':
+                facets['decade'].append(
+                    {'decade': int(row['key']), 'count': row['count']}
+                )
+            else:
+                facets[row['facet']].append(
+                    {'slug': row['key'], 'count': row['count']}
+                )
+        for buckets in facets.values():
+            buckets.sort(key=lambda bucket: -bucket['count'])
+        return Response(facets, status=status.HTTP_200_OK)
+
+
+class ReviewViewSet(NestedViewSetMixin, ConditionalGetMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для модели Review."""
 
+    version_namespaces = (REVIEWS_CACHE_NAMESPACE, USERS_CACHE_NAMESPACE)
+    queryset = Review.objects.all()
+    parent_lookups = {'title_id': 'title_id'}
+    parent_model = Title
+    parent_model_lookups = {'pk': 'title_id'}
     serializer_class = ReviewSerializer
+    cursor_ordering = ('-pub_date', 'id')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdminOrOwnerOrReadOnly)
     http_method_names = ['get', 'post', 'patch', 'delete']
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_serializer_class().setup_eager_loading(
+            super().get_queryset()
+        )
 
     def perform_create(self, serializer):
-        serializer.save(title=self.get_title(), author=self.request.user)
+        serializer.save(title=self.get_parent(), author=self.request.user)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedViewSetMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для модели Comment."""
 
+    version_namespaces = (COMMENTS_CACHE_NAMESPACE, USERS_CACHE_NAMESPACE)
+    queryset = Comment.objects.all()
+    parent_lookups = {'review_id': 'review_id', 'review__title_id': 'title_id'}
+    parent_model = Review
+    parent_model_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
     serializer_class = CommentSerializer
+    cursor_ordering = ('-pub_date', 'id')
     permission_classes = (IsAuthenticatedOrReadOnly, IsAdminOrOwnerOrReadOnly)
     http_method_names = ['get', 'post', 'patch', 'delete']
 
-    def get_review(self):
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id'),
-            title=self.kwargs.get('title_id')
-        )
-
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_serializer_class().setup_eager_loading(
+            super().get_queryset()
+        )
 
     def perform_create(self, serializer):
-        review = self.get_review()
-        serializer.save(review=review, author=self.request.user)
+        serializer.save(review=self.get_parent(), author=self.request.user)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -122,13 +174,24 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminOrMetricsAllowedIP])
+def metrics_view(request):
+    """Метрики всех процессов приложения в формате Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type=metrics.CONTENT_TYPE
+    )
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def sign_up(request):
     serializer = SignupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    serializer.save()
-    get_user_and_send_mail(serializer.data['username'])
+    with transaction.atomic():
+        queue_confirmation_mail(serializer.save())
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -143,6 +206,6 @@ def get_token(request):
     )
     request_code = serializer.validated_data['confirmation_code']
     if request_code == user.confirmation_code:
-        token = RefreshToken.for_user(user)
+        token = AccessToken.for_user(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -25,6 +26,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.QueryTimingMiddleware',
+    'api.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,7 +48,7 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitOffsetOrCursorPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -82,6 +86,51 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Поколения данных должны быть общими для всех процессов приложения:
+    # иначе после записи в одном процессе другие отдают устаревшие кэш и
+    # ETag. Ключи не вытесняются. Для нескольких серверов укажите здесь
+    # Redis без политики вытеснения.
+    'generations': {
+        'BACKEND': 'api.cache.GenerationsFileCache',
+        'LOCATION': os.environ.get(
+            'GENERATIONS_CACHE_DIR', BASE_DIR / 'cache' / 'generations'
+        ),
+    },
+}
+
+GENERATIONS_CACHE_ALIAS = 'generations'
+
+RESPONSE_CACHE_TIMEOUT = 60 * 15
+
+DB_TIMING_ENABLED = DEBUG
+
+DB_TIMING_SLOW_QUERIES = 20
+
+DB_TIMING_SLOW_MS = 200
+
+PROFILING_ENABLED = True
+
+PROFILING_SAMPLE_RATE = 0.0
+
+PROFILING_DIR = BASE_DIR / 'profiles'
+
+METRICS_ENABLED = True
+
+# Общий каталог значений метрик процессов для pre-fork WSGI-сервера;
+# без него /metrics показывает только свой процесс.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+METRICS_FLUSH_INTERVAL = 1
+
+# Адреса, с которых /metrics доступен без токена администратора.
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -114,3 +163,26 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 AUTH_USER_MODEL = 'reviews.User'
 
 EMAIL_SENDER = 'info@api_yamdb.not'
+
+# Очередь писем, которую отправляет команда send_emails.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# Задержка перед повторной отправкой в секундах, удваивается с каждой
+# неудачной попыткой.
+EMAIL_OUTBOX_RETRY_DELAY = 60
+
+# На это время письма пачки скрыты от других экземпляров команды.
+EMAIL_OUTBOX_LEASE = 300
+
+EMAIL_OUTBOX_POLL_INTERVAL = 5
+
+IMPORT_MANIFEST_DIR = BASE_DIR / 'import_manifests'
+
+BENCHMARK_BASELINE = BASE_DIR / 'benchmarks' / 'baseline.json'
+
+POSTMAN_COLLECTION = (
+    BASE_DIR.parent / 'postman_collection'
+    / 'Ymdb-collection.postman_collection.json'
+)
@@ -1,13 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
-from django.db.models import Avg
-from django.db.models.query import QuerySet
-from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
 
 from reviews.constants import SHORT_TITLE
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, OutgoingEmail, Review,
+                            Title, User)
+from reviews.search import search_titles
 
 
 class BaseAdminReviewsAndComments(admin.ModelAdmin):
@@ -48,13 +47,12 @@ class TitleAdmin(admin.ModelAdmin):
         genres = get_object_or_404(Title, pk=obj.pk).genre.all()
         return list(genres)
 
-    def get_queryset(self, request: HttpRequest) -> QuerySet:
-        queryset = super().get_queryset(request)
-        return queryset.annotate(rating=Avg('reviews__score'))
+    def get_search_results(self, request, queryset, search_term):
+        return search_titles(queryset, search_term), False
 
     @admin.display(description='Рейтинг')
     def score(self, obj):
-        return obj.rating if obj.rating else 'Нет данных'
+        return obj.rating if obj.rating_count else 'Нет данных'
 
 
 @admin.register(User)
@@ -85,6 +83,18 @@ class CommentAdmin(BaseAdminReviewsAndComments):
     )
 
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'created',
+        'send_after',
+        'attempts',
+    )
+    search_fields = ('recipient',)
+
+
 @admin.register(Category)
 class CategoryAdmin(BaseAdminCategoriesAndGenres):
     pass
@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
     verbose_name = 'Портал отзывов по произведениям'
+
+    def ready(self):
+        import reviews.signals  # noqa: F401
+        from reviews.search import create_search_index
+
+        post_migrate.connect(create_search_index, sender=self)
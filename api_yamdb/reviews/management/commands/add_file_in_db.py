@@ -1,14 +1,32 @@
 import csv
+import multiprocessing
 import os
-import sys
+import sqlite3
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from hashlib import blake2b
+from itertools import islice
+from time import perf_counter
 
 import django
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
 
+from api.cache import (CATEGORIES_CACHE_NAMESPACE, COMMENTS_CACHE_NAMESPACE,
+                       GENRES_CACHE_NAMESPACE, REVIEWS_CACHE_NAMESPACE,
+                       TITLES_CACHE_NAMESPACE, USERS_CACHE_NAMESPACE,
+                       bump_all_generations)
+from api.signals import invalidate, invalidate_review_titles
 from reviews.models import (Comment, Category, Title, Review,
                             Genre,)
 from reviews.constants import FILES, PATH_TO_DATA
+from reviews.management.commands.update_ratings import (
+    refresh_comments_counts, refresh_ratings)
+from reviews.search import index_title, is_search_index_supported
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
@@ -16,42 +34,520 @@ django.setup()
 
 User = get_user_model()
 
+DEFAULT_BATCH_SIZE = 1000
 
-def object_create(data, model, related_model: dict = None):
-    if related_model:
-        field = list(related_model.keys())[0]
-        RelatedModel = related_model[field]
-        data[field] = RelatedModel.objects.get(
-            pk=data[field]
-        )
-    obj = model(**data)
-    obj.save()
+DEFAULT_PARTITION_SIZE = 100_000
+
+SQLITE_BUSY_TIMEOUT_MS = 10 * 60 * 1000
+
+# Модель, поля внешних ключей (в .csv записаны без суффикса `_id`)
+# и файлы, которые должны быть загружены раньше.
+LOAD_PLAN = {
+    'users': (User, (), ()),
+    'category': (Category, (), ()),
+    'genre': (Genre, (), ()),
+    'titles': (Title, ('category',), ('category',)),
+    'genre_title': (Title.genre.through, (), ('titles', 'genre')),
+    'review': (Review, ('author',), ('titles', 'users')),
+    'comments': (Comment, ('author',), ('review', 'users')),
+}
+
+# Для --upsert: поле, через которое изменение строки затрагивает
+# счётчики родительского объекта.
+PARENT_FIELDS = {
+    'review': 'title_id',
+    'comments': 'review_id',
+}
+
+# Для --upsert: пространства имён кэша ответов, которые устаревают при
+# изменении строк файла.
+CACHE_NAMESPACES = {
+    'users': (USERS_CACHE_NAMESPACE,),
+    'category': (CATEGORIES_CACHE_NAMESPACE, TITLES_CACHE_NAMESPACE),
+    'genre': (GENRES_CACHE_NAMESPACE, TITLES_CACHE_NAMESPACE),
+    'titles': (TITLES_CACHE_NAMESPACE,),
+    'genre_title': (TITLES_CACHE_NAMESPACE,),
+    'review': (TITLES_CACHE_NAMESPACE,),
+    'comments': (),
+}
+
+# Ограничение SQLite на число параметров запроса в старых версиях.
+MANIFEST_LOOKUP_SIZE = 500
+
+
+def iterate_lines(f, stop=None):
+    """Строки двоичного файла с текущей позиции до байта stop."""
+    position = f.tell()
+    for line in f:
+        if stop is not None and position >= stop:
+            return
+        position += len(line)
+        yield line.decode('utf-8')
 
 
-def parse_file_and_create_models(file, model, related_model=None):
-    path = os.path.abspath(fr'{PATH_TO_DATA}{file}')
-    with open(file=path, mode='r', encoding='utf-8',) as f:
-        reader = csv.DictReader(f)
+def read_fieldnames(f):
+    return next(csv.reader([f.readline().decode('utf-8')]), [])
+
+
+@contextmanager
+def keep_file_dates(model, path):
+    """Отключает auto_now_add у полей, значения которых есть в файле:
+    иначе при сохранении даты из файла заменились бы текущим временем."""
+    with open(file=path, mode='rb') as f:
+        fieldnames = read_fieldnames(f)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+        and field.attname in fieldnames
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield [field.attname for field in fields]
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_rows(path, model, foreign_keys=(), start=None, stop=None):
+    """Построчно читает .csv, подставляя id связанных объектов
+    напрямую в столбцы внешних ключей. Пустые значения столбцов,
+    допускающих NULL, загружаются как NULL.
+
+    Если задан диапазон байтов [start, stop) из get_partitions, читаются
+    только записи, начинающиеся в нём.
+    """
+    columns = {
+        field: model._meta.get_field(field).attname for field in foreign_keys
+    }
+    with open(file=path, mode='rb') as f:
+        fieldnames = read_fieldnames(f)
+        if start is not None:
+            f.seek(start)
+        reader = csv.DictReader(iterate_lines(f, stop), fieldnames=fieldnames)
+        nullable = [
+            column for column in fieldnames
+            if column not in columns and model._meta.get_field(column).null
+        ]
         for data in reader:
+            for field, attname in columns.items():
+                data[attname] = data.pop(field) or None
+            for column in nullable:
+                data[column] = data[column] or None
+            yield data
+
+
+def get_path(data_path, name):
+    return os.path.abspath(os.path.join(data_path, FILES[name]))
+
+
+def parse_file_and_create_models(path, model, foreign_keys=(),
+                                 batch_size=DEFAULT_BATCH_SIZE,
+                                 start=None, stop=None):
+    """Загружает записи из диапазона байтов [start, stop) файла (по
+    умолчанию - весь файл) пачками через bulk_create в одной транзакции и
+    возвращает число загруженных строк."""
+    rows = read_rows(path, model, foreign_keys, start, stop)
+    loaded = 0
+    with keep_file_dates(model, path), transaction.atomic():
+        while True:
+            batch = [model(**data) for data in islice(rows, batch_size)]
+            if not batch:
+                break
             try:
-                object_create(data, model, related_model)
+                model.objects.bulk_create(batch, batch_size=batch_size)
             except Exception as e:
-                raise Exception(f'Возникла ошибка типа {e}')
-        sys.stdout.write(f'{file} done!\n')
+                raise CommandError(
+                    f'{os.path.basename(path)}: возникла ошибка типа {e}'
+                )
+            loaded += len(batch)
+    return loaded
+
+
+def load_partition(data_path, name, start, stop, batch_size):
+    """Задача для процесса-исполнителя: загружает диапазон байтов
+    файла."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}')
+    model, foreign_keys, _ = LOAD_PLAN[name]
+    return name, parse_file_and_create_models(
+        get_path(data_path, name), model, foreign_keys, batch_size, start,
+        stop
+    )
+
+
+def get_partitions(data_path, name, partition_size):
+    """Делит файл на диапазоны байтов примерно по partition_size записей,
+    чтобы каждый процесс читал и разбирал только свой диапазон.
+
+    Граница ставится после перевода строки вне кавычек: записи, значения
+    которых содержат переводы строк, не разрезаются.
+    """
+    partitions = []
+    with open(get_path(data_path, name), 'rb') as f:
+        start = position = len(f.readline())
+        records = quotes = 0
+        for line in f:
+            position += len(line)
+            quotes += line.count(b'"')
+            if quotes % 2:
+                continue
+            records += 1
+            if records == partition_size:
+                partitions.append((data_path, name, start, position))
+                start, records = position, 0
+    if records or not partitions:
+        partitions.append((data_path, name, start, position))
+    return partitions
+
+
+def get_row_checksum(row):
+    raw_row = '\x1f'.join(f'{value}' for value in row.values())
+    return blake2b(raw_row.encode(), digest_size=8).hexdigest()
+
+
+def get_manifest_path(manifest_dir, name):
+    return os.path.join(manifest_dir, f'{FILES[name]}.sqlite3')
+
+
+def chunked(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class Manifest:
+    """Контрольные суммы строк файла с прошлой загрузки: по строке на
+    первичный ключ в таблице SQLite, поэтому память не зависит от размера
+    файла. Изменения сохраняются только вызовом commit."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS manifest ('
+            'key TEXT PRIMARY KEY, checksum TEXT NOT NULL, '
+            'seen INTEGER NOT NULL DEFAULT 0)'
+        )
+        self.connection.execute('UPDATE manifest SET seen = 0')
+
+    def update(self, checksums):
+        """Записывает контрольные суммы пачки строк {pk: checksum} и
+        возвращает первичные ключи строк, которые изменились."""
+        previous = {}
+        for keys in chunked(checksums, MANIFEST_LOOKUP_SIZE):
+            previous.update(self.connection.execute(
+                'SELECT key, checksum FROM manifest WHERE key IN '
+                f'({", ".join("?" * len(keys))})', keys
+            ))
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO manifest (key, checksum, seen) '
+            'VALUES (?, ?, 1)', checksums.items()
+        )
+        return {
+            key for key, checksum in checksums.items()
+            if previous.get(key) != checksum
+        }
+
+    def iterate_stale(self, batch_size):
+        """Пачки первичных ключей строк, исчезнувших из файла."""
+        cursor = self.connection.execute(
+            'SELECT key FROM manifest WHERE seen = 0'
+        )
+        while True:
+            keys = [key for key, in cursor.fetchmany(batch_size)]
+            if not keys:
+                return
+            yield keys
+
+    def commit(self):
+        self.connection.execute('DELETE FROM manifest WHERE seen = 0')
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def upsert_file(path, model, foreign_keys, manifest, batch_size,
+                parent_field=None):
+    """Добавляет и обновляет пачками только строки, контрольная сумма
+    которых изменилась с прошлой загрузки.
+
+    Возвращает статистику, первичные ключи записанных строк и id
+    родителей (parent_field) до и после изменения.
+    """
+    pk_field = model._meta.pk
+    parent = model._meta.get_field(parent_field) if parent_field else None
+    stats, touched, parents = Counter(), set(), set()
+    fields = []
+
+    def flush(rows):
+        changed_keys = manifest.update({
+            row[pk_field.attname]: get_row_checksum(row) for row in rows
+        })
+        changed = [
+            row for row in rows if row[pk_field.attname] in changed_keys
+        ]
+        stats['без изменений'] += len(rows) - len(changed)
+        pks = [pk_field.to_python(row[pk_field.attname]) for row in changed]
+        if parent:
+            existing = dict(
+                model.objects.filter(pk__in=pks)
+                .values_list('pk', parent.attname)
+            )
+            parents.update(existing.values())
+            parents.update(
+                parent.to_python(row[parent.attname]) for row in changed
+            )
+        else:
+            existing = set(
+                model.objects.filter(pk__in=pks).values_list('pk', flat=True)
+            )
+        new_objects, updated_objects = [], []
+        for pk, row in zip(pks, changed):
+            objects = updated_objects if pk in existing else new_objects
+            objects.append(model(**row))
+        model.objects.bulk_create(new_objects, batch_size=batch_size)
+        if updated_objects:
+            model.objects.bulk_update(
+                updated_objects, fields, batch_size=batch_size
+            )
+        touched.update(pks)
+        stats['добавлено'] += len(new_objects)
+        stats['обновлено'] += len(updated_objects)
+
+    rows = read_rows(path, model, foreign_keys)
+    with keep_file_dates(model, path) as dates, transaction.atomic():
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            if not fields:
+                fields = [
+                    column for column in batch[0]
+                    if column != pk_field.attname
+                    and (
+                        model._meta.get_field(column).editable
+                        or column in dates
+                    )
+                    and column not in getattr(model, 'COUNTER_FIELDS', ())
+                ]
+            flush(batch)
+    return stats, touched, parents
+
+
+def delete_rows(model, batches):
+    """Удаляет строки пачками; сигналы удаления сами обновляют счётчики,
+    поисковый индекс и кэш ответов."""
+    deleted = 0
+    with transaction.atomic():
+        for pks in batches:
+            model.objects.filter(pk__in=pks).delete()
+            deleted += len(pks)
+    return deleted
+
+
+def refresh_denormalized_data(stdout):
+    """bulk_create не вызывает сигналы, поэтому рейтинги, поисковый индекс
+    и кэш ответов обновляются после загрузки целиком."""
+    call_command('update_ratings', stdout=stdout)
+    if is_search_index_supported():
+        call_command('rebuild_search_index', stdout=stdout)
+    bump_all_generations()
+
+
+def refresh_changed_data(changes, batch_size):
+    """Обновляет после --upsert рейтинги, счётчики комментариев,
+    поисковый индекс и кэш ответов только для записанных строк и их
+    родителей: bulk_create и bulk_update не вызывают сигналы.
+
+    changes: {файл: (первичные ключи записанных строк, id родителей)}.
+    """
+    title_ids = changes['titles'][0] | changes['review'][1]
+    review_ids = changes['review'][0] | changes['comments'][1]
+    for pks in chunked(sorted(title_ids), batch_size):
+        refresh_ratings(Title.objects.filter(pk__in=pks))
+    for pks in chunked(sorted(review_ids), batch_size):
+        refresh_comments_counts(Review.objects.filter(pk__in=pks))
+    if is_search_index_supported():
+        for pks in chunked(sorted(changes['titles'][0]), batch_size):
+            for title in Title.objects.filter(pk__in=pks).only(
+                'name', 'description'
+            ):
+                index_title(title)
+    invalidate_changed_data(changes)
+
+
+def invalidate_changed_data(changes):
+    """Сбрасывает кэш ответов записанных строк и их родителей."""
+    for name, (touched, _) in changes.items():
+        if touched:
+            for namespace in CACHE_NAMESPACES[name]:
+                invalidate(namespace)
+    for title_id in changes['review'][1]:
+        invalidate(REVIEWS_CACHE_NAMESPACE, title_id=title_id)
+    for review_id in changes['comments'][1]:
+        invalidate(COMMENTS_CACHE_NAMESPACE, review_id=review_id)
+        invalidate_review_titles(review_id)
 
 
 class Command(BaseCommand):
     help = 'Добавляет данные из .csv файлов в базу данных'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-path',
+            default=PATH_TO_DATA,
+            help='Каталог с .csv файлами'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов для параллельной загрузки'
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Загрузить только изменения с прошлого запуска'
+        )
+        parser.add_argument(
+            '--manifest-dir',
+            default=settings.IMPORT_MANIFEST_DIR,
+            help='Каталог манифестов контрольных сумм для --upsert'
+        )
+        parser.add_argument(
+            '--partition-size',
+            type=int,
+            default=DEFAULT_PARTITION_SIZE,
+            help='Количество строк файла в одной задаче процесса'
+        )
+
     def handle(self, *args, **options):
-        parse_file_and_create_models(FILES['users'], model=User)
-        parse_file_and_create_models(FILES['category'], model=Category)
-        parse_file_and_create_models(FILES['genre'], model=Genre)
-        parse_file_and_create_models(FILES['titles'], model=Title,
-                                     related_model={'category': Category})
-        parse_file_and_create_models(FILES['genre_title'],
-                                     model=Title.genre.through)
-        parse_file_and_create_models(FILES['review'], model=Review,
-                                     related_model={'author': User})
-        parse_file_and_create_models(FILES['comments'], model=Comment,
-                                     related_model={'author': User})
+        for option in ('batch_size', 'workers', 'partition_size'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть положительным'
+                )
+        workers = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite' and (
+            connection.is_in_memory_db()
+        ):
+            self.stderr.write(
+                'База данных SQLite в памяти недоступна другим процессам, '
+                'файлы будут загружены последовательно.'
+            )
+            workers = 1
+        if options['upsert']:
+            if workers > 1:
+                raise CommandError('--upsert не совместим с --workers')
+            self.load_changes(options)
+            return
+        if workers == 1:
+            self.load_serial(options)
+        else:
+            self.load_parallel(workers, options)
+        refresh_denormalized_data(self.stdout)
+
+    def report(self, name, loaded, elapsed):
+        self.stdout.write(
+            f'{FILES[name]} done! {loaded} строк за {elapsed:.2f} с '
+            f'({loaded / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+
+    def load_changes(self, options):
+        """Загружает изменения всех файлов, затем удаляет исчезнувшие
+        строки в обратном порядке зависимостей и обновляет данные,
+        зависящие от записанных строк."""
+        manifests, results, changes = {}, {}, {}
+        try:
+            for name, (model, foreign_keys, _) in LOAD_PLAN.items():
+                started = perf_counter()
+                manifests[name] = Manifest(
+                    get_manifest_path(options['manifest_dir'], name)
+                )
+                stats, *changes[name] = upsert_file(
+                    get_path(options['data_path'], name), model,
+                    foreign_keys, manifests[name], options['batch_size'],
+                    PARENT_FIELDS.get(name)
+                )
+                results[name] = stats, perf_counter() - started
+            for name in reversed(LOAD_PLAN):
+                stats, elapsed = results[name]
+                started = perf_counter()
+                stats['удалено'] = delete_rows(
+                    LOAD_PLAN[name][0],
+                    manifests[name].iterate_stale(options['batch_size'])
+                )
+                results[name] = stats, elapsed + perf_counter() - started
+            refresh_changed_data(changes, options['batch_size'])
+            for manifest in manifests.values():
+                manifest.commit()
+        finally:
+            for manifest in manifests.values():
+                manifest.close()
+        for name, (stats, elapsed) in results.items():
+            summary = ', '.join(
+                f'{action}: {count}' for action, count in stats.items()
+            )
+            self.stdout.write(
+                f'{FILES[name]} done! {summary} за {elapsed:.2f} с'
+            )
+
+    def load_serial(self, options):
+        for name in LOAD_PLAN:
+            started = perf_counter()
+            _, loaded = load_partition(
+                options['data_path'], name, None, None, options['batch_size']
+            )
+            self.report(name, loaded, perf_counter() - started)
+
+    def load_parallel(self, workers, options):
+        """Запускает файл, как только загружены все файлы, от которых он
+        зависит; крупные файлы делятся на диапазоны байтов примерно по
+        --partition-size записей."""
+        pending = dict(LOAD_PLAN)
+        done = set()
+        remaining, loaded, started = {}, {}, {}
+        running = set()
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(workers, mp_context=context) as executor:
+            while pending or running:
+                for name, (_, _, dependencies) in list(pending.items()):
+                    if not set(dependencies) <= done:
+                        continue
+                    del pending[name]
+                    partitions = get_partitions(
+                        options['data_path'], name, options['partition_size']
+                    )
+                    remaining[name], loaded[name] = len(partitions), 0
+                    started[name] = perf_counter()
+                    running.update(
+                        executor.submit(
+                            load_partition, *partition,
+                            options['batch_size']
+                        )
+                        for partition in partitions
+                    )
+                if not running:
+                    raise CommandError(
+                        f'Не удаётся разрешить зависимости: {list(pending)}'
+                    )
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, count = future.result()
+                    loaded[name] += count
+                    remaining[name] -= 1
+                    if not remaining[name]:
+                        done.add(name)
+                        self.report(
+                            name, loaded[name], perf_counter() - started[name]
+                        )
@@ -0,0 +1,143 @@
+import csv
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reviews.constants import COLUMNS, FILES
+from reviews.management.commands.add_file_in_db import LOAD_PLAN
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(f'{path}.gz', 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def get_columns(name):
+    """Заголовок файла: столбцы формата add_file_in_db, затем остальные
+    поля модели, чтобы выгрузка не теряла данных. Внешние ключи из
+    LOAD_PLAN записываются без суффикса `_id`."""
+    model, foreign_keys, _ = LOAD_PLAN[name]
+    fields = [
+        field.name if field.name in foreign_keys else field.attname
+        for field in model._meta.concrete_fields
+    ]
+    return COLUMNS[name] + tuple(
+        field for field in fields if field not in COLUMNS[name]
+    )
+
+
+def format_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iterate_rows(name, columns, chunk_size):
+    """Построчно читает таблицу курсором порциями по chunk_size строк,
+    не загружая её в память целиком."""
+    model = LOAD_PLAN[name][0]
+    attnames = [model._meta.get_field(column).attname for column in columns]
+    queryset = model.objects.order_by('pk').values_list(*attnames)
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield [format_value(value) for value in row]
+
+
+def export_table(name, output_dir, chunk_size, compress, ndjson):
+    """Выгружает таблицу в .csv (и .ndjson) в формате add_file_in_db.
+    В .csv пустое значение и NULL неразличимы, в .ndjson NULL - null."""
+    started = perf_counter()
+    path = os.path.join(output_dir, FILES[name])
+    ndjson_path = f'{os.path.splitext(path)[0]}.ndjson'
+    columns = get_columns(name)
+    exported = 0
+    with ExitStack() as stack:
+        writer = csv.writer(stack.enter_context(open_output(path, compress)))
+        writer.writerow(columns)
+        if ndjson:
+            ndjson_file = stack.enter_context(
+                open_output(ndjson_path, compress)
+            )
+        for row in iterate_rows(name, columns, chunk_size):
+            writer.writerow(row)
+            if ndjson:
+                ndjson_file.write(json.dumps(
+                    dict(zip(columns, row)), ensure_ascii=False
+                ) + '\n')
+            exported += 1
+    return name, exported, perf_counter() - started
+
+
+def export_table_in_thread(*args):
+    """Задача для потока-исполнителя: у каждого потока своё соединение
+    с базой, его нужно закрыть по окончании."""
+    try:
+        return export_table(*args)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает все поля таблиц каталога, включая хэши паролей '
+        'пользователей, в .csv файлы в формате add_file_in_db'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Каталог для выгрузки')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за один раз'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы gzip'
+        )
+        parser.add_argument(
+            '--ndjson',
+            action='store_true',
+            help='Дополнительно выгружать файлы .ndjson'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество таблиц, выгружаемых одновременно'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('chunk_size', 'workers'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть положительным'
+                )
+        os.makedirs(options['output_dir'], exist_ok=True)
+        tasks = [
+            (name, options['output_dir'], options['chunk_size'],
+             options['gzip'], options['ndjson'])
+            for name in LOAD_PLAN
+        ]
+        if options['workers'] == 1:
+            self.report(export_table(*task) for task in tasks)
+            return
+        with ThreadPoolExecutor(options['workers']) as executor:
+            self.report(executor.map(export_table_in_thread, *zip(*tasks)))
+
+    def report(self, results):
+        for name, exported, elapsed in results:
+            self.stdout.write(
+                f'{FILES[name]} done! {exported} строк за {elapsed:.2f} с '
+                f'({exported / max(elapsed, 1e-9):.0f} строк/с)'
+            )
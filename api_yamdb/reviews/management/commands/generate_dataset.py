@@ -0,0 +1,235 @@
+import random
+from itertools import islice
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.constants import MAX_SCORE, MIN_SCORE
+from reviews.enums import UserRoles
+from reviews.management.commands.add_file_in_db import (
+    DEFAULT_BATCH_SIZE, refresh_denormalized_data)
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.utils import get_current_year
+
+WORDS = (
+    'тайна', 'остров', 'дорога', 'война', 'мир', 'город', 'ночь', 'звезда',
+    'море', 'король', 'песня', 'время', 'сердце', 'тень', 'огонь', 'зима',
+    'лето', 'дом', 'небо', 'река', 'история', 'последний', 'первый',
+    'тёмный', 'светлый', 'забытый', 'далёкий', 'новый', 'старый', 'великий',
+)
+
+ROLES = (
+    (UserRoles.user.name, 90),
+    (UserRoles.moderator.name, 8),
+    (UserRoles.admin.name, 2),
+)
+
+MIN_YEAR = 1900
+
+MAX_GENRES_PER_TITLE = 3
+
+
+def get_next_id(model):
+    return (model.objects.aggregate(last_id=Max('pk'))['last_id'] or 0) + 1
+
+
+def get_text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def distribute(total, slots, capacity, skew, rng):
+    """Распределяет total объектов по slots местам по закону Ципфа
+    с показателем skew, не превышая capacity на одно место.
+
+    Порядок мест перемешивается, чтобы популярность не зависела от id.
+    """
+    if total > slots * capacity:
+        raise CommandError(
+            f'Нельзя разместить {total} объектов в {slots} местах '
+            f'по {capacity} на каждое'
+        )
+    weights = [1 / rank ** skew for rank in range(1, slots + 1)]
+    total_weight = sum(weights)
+    counts = [
+        min(capacity, int(total * weight / total_weight))
+        for weight in weights
+    ]
+    remainder = total - sum(counts)
+    while remainder:
+        for slot in range(slots):
+            if not remainder:
+                break
+            if counts[slot] < capacity:
+                counts[slot] += 1
+                remainder -= 1
+    rng.shuffle(counts)
+    return counts
+
+
+def create_in_batches(model, objects, batch_size):
+    """Сохраняет объекты из генератора пачками в одной транзакции,
+    не держа в памяти больше одной пачки."""
+    created = 0
+    with transaction.atomic():
+        while True:
+            batch = list(islice(objects, batch_size))
+            if not batch:
+                return created
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+
+
+class Command(BaseCommand):
+    help = 'Генерирует воспроизводимый набор данных заданного размера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.0,
+            help='Показатель закона Ципфа для числа отзывов на произведение'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора случайных чисел'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одном INSERT'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('users', 'categories', 'genres', 'titles',
+                       'batch_size'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть положительным'
+                )
+        for option in ('reviews', 'comments', 'skew'):
+            if options[option] < 0:
+                raise CommandError(f'--{option} не может быть отрицательным')
+        if options['comments'] and not options['reviews']:
+            raise CommandError('Для комментариев нужны отзывы')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Первичные ключи назначаются заранее, чтобы связанные объекты
+        # ссылались на них без повторного чтения из базы.
+        self.first_ids = {
+            model: get_next_id(model)
+            for model in (User, Category, Genre, Title, Review)
+        }
+        review_counts = distribute(
+            options['reviews'], options['titles'], options['users'],
+            options['skew'], self.rng
+        )
+        self.generate(User, self.get_users(options['users']))
+        self.generate(Category, self.get_slugged(
+            Category, 'category', options['categories']
+        ))
+        self.generate(Genre, self.get_slugged(
+            Genre, 'genre', options['genres']
+        ))
+        self.generate(Title, self.get_titles(
+            options['titles'], options['categories']
+        ))
+        self.generate(Title.genre.through, self.get_title_genres(
+            options['titles'], options['genres']
+        ))
+        self.generate(Review, self.get_reviews(
+            review_counts, options['users']
+        ))
+        self.generate(Comment, self.get_comments(
+            options['comments'], options['reviews'], options['users']
+        ))
+        refresh_denormalized_data(self.stdout)
+
+    def generate(self, model, objects):
+        started = perf_counter()
+        created = create_in_batches(model, objects, self.batch_size)
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.db_table} done! {created} строк за '
+            f'{elapsed:.2f} с ({created / max(elapsed, 1e-9):.0f} строк/с)'
+        )
+
+    def get_users(self, count):
+        password = make_password(None)
+        roles, weights = zip(*ROLES)
+        for pk in range(self.first_ids[User], self.first_ids[User] + count):
+            yield User(
+                pk=pk,
+                username=f'user_{pk}',
+                email=f'user_{pk}@yamdb.fake',
+                password=password,
+                role=self.rng.choices(roles, weights)[0],
+            )
+
+    def get_slugged(self, model, prefix, count):
+        for pk in range(self.first_ids[model], self.first_ids[model] + count):
+            yield model(
+                pk=pk,
+                name=get_text(self.rng, 2).capitalize(),
+                slug=f'{prefix}-{pk}'
+            )
+
+    def get_titles(self, count, categories):
+        current_year = get_current_year()
+        first_id = self.first_ids[Title]
+        for pk in range(first_id, first_id + count):
+            yield Title(
+                pk=pk,
+                name=f'{get_text(self.rng, 3).capitalize()} {pk}',
+                year=self.rng.randint(MIN_YEAR, current_year),
+                description=get_text(self.rng, 12),
+                category_id=(
+                    self.first_ids[Category] + self.rng.randrange(categories)
+                ),
+            )
+
+    def get_title_genres(self, titles, genres):
+        first_id = self.first_ids[Title]
+        for title_id in range(first_id, first_id + titles):
+            count = self.rng.randint(1, min(genres, MAX_GENRES_PER_TITLE))
+            for offset in self.rng.sample(range(genres), count):
+                yield Title.genre.through(
+                    title_id=title_id,
+                    genre_id=self.first_ids[Genre] + offset
+                )
+
+    def get_reviews(self, review_counts, users):
+        """Авторы отзывов на одно произведение не повторяются, как требует
+        ограничение unique_title_review_."""
+        pk = self.first_ids[Review]
+        for offset, count in enumerate(review_counts):
+            base_score = self.rng.randint(MIN_SCORE, MAX_SCORE)
+            for author_offset in self.rng.sample(range(users), count):
+                score = base_score + self.rng.randint(-2, 2)
+                yield Review(
+                    pk=pk,
+                    title_id=self.first_ids[Title] + offset,
+                    author_id=self.first_ids[User] + author_offset,
+                    score=min(max(score, MIN_SCORE), MAX_SCORE),
+                    text=get_text(self.rng, 20),
+                )
+                pk += 1
+
+    def get_comments(self, count, reviews, users):
+        for _ in range(count):
+            yield Comment(
+                review_id=self.first_ids[Review] + self.rng.randrange(reviews),
+                author_id=self.first_ids[User] + self.rng.randrange(users),
+                text=get_text(self.rng, 10),
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.search import is_search_index_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс произведений'
+
+    def handle(self, *args, **options):
+        if not is_search_index_supported():
+            raise CommandError(
+                'Полнотекстовый индекс доступен только для SQLite'
+            )
+        with transaction.atomic():
+            indexed = rebuild_search_index()
+        self.stdout.write(f'Проиндексировано произведений: {indexed}')
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, NullIf
+
+from reviews.models import Comment, Review, Title
+
+
+def refresh_ratings(titles):
+    """Пересчитывает сумму и количество оценок и рейтинг произведений
+    выборки по их отзывам."""
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    updated = titles.update(
+        rating_sum=Coalesce(
+            Subquery(
+                reviews.annotate(total=Sum('score')).values('total')
+            ),
+            0
+        ),
+        rating_count=Coalesce(
+            Subquery(
+                reviews.annotate(total=Count('pk')).values('total')
+            ),
+            0
+        ),
+    )
+    titles.update(rating=F('rating_sum') / NullIf(F('rating_count'), 0))
+    return updated
+
+
+def refresh_comments_counts(reviews):
+    """Пересчитывает число комментариев отзывов выборки."""
+    return reviews.update(
+        comments_count=Coalesce(
+            Subquery(
+                Comment.objects.filter(review=OuterRef('pk'))
+                .order_by()
+                .values('review')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0
+        )
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сохранённые рейтинги и число отзывов произведений '
+        'и число комментариев отзывов'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = refresh_ratings(Title.objects.all())
+            comments_updated = refresh_comments_counts(Review.objects.all())
+        self.stdout.write(f'Рейтинги пересчитаны: {updated}')
+        self.stdout.write(
+            f'Счётчики комментариев пересчитаны: {comments_updated}'
+        )
@@ -1,9 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
 
-from reviews.constants import (MAX_FIELD_NAME, MAX_LENGTH_USERNAME, MAX_SCORE,
-                               MIN_SCORE, SHORT_TITLE)
+from reviews.constants import (MAX_FIELD_NAME, MAX_LENGTH_EMAIL,
+                               MAX_LENGTH_USERNAME, MAX_SCORE, MIN_SCORE,
+                               SHORT_TITLE)
 from reviews.enums import UserRoles
 from reviews.validators import validate_username
 from reviews.utils import get_current_year
@@ -36,6 +40,27 @@ class SlugModel(models.Model):
         abstract = True
 
 
+class CounterFieldsModel(models.Model):
+    """Абстрактная модель с полями COUNTER_FIELDS, которые изменяются
+    только атомарными UPDATE в сигналах."""
+
+    COUNTER_FIELDS = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """Не перезаписывает счётчики значениями, загруженными вместе
+        с объектом."""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
 class TextAndDateModel(models.Model):
     """Абстактная модель для общего поля Текст и Дата публикации."""
 
@@ -53,7 +78,7 @@ class TextAndDateModel(models.Model):
 
     class Meta:
         abstract = True
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', 'id']
 
     def __str__(self):
         return self.text[:SHORT_TITLE]
@@ -101,7 +126,48 @@ class Genre(NameModel, SlugModel):
         verbose_name_plural = 'Жанры'
 
 
-class Title(NameModel):
+class TitleQuerySet(models.QuerySet):
+
+    def update_rating(self, title_id, score_delta, count_delta):
+        """Атомарно изменяет сумму и количество оценок произведения
+        и пересчитывает рейтинг одним UPDATE."""
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.filter(pk=title_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=rating_sum / NullIf(rating_count, 0)
+        )
+
+    def facet_counts(self):
+        """Считает произведения выборки по жанрам, категориям и
+        десятилетиям одним запросом UNION ALL из группировок."""
+        titles = self.order_by().values('pk')
+        genres = (
+            Title.genre.through.objects.filter(title_id__in=titles)
+            .values(facet=Value('genre', CharField()),
+                    key=Cast('genre__slug', CharField()))
+            .annotate(count=Count('title_id'))
+            .order_by()
+        )
+        categories = (
+            Title.objects.filter(pk__in=titles, category__isnull=False)
+            .values(facet=Value('category', CharField()),
+                    key=Cast('category__slug', CharField()))
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        decades = (
+            Title.objects.filter(pk__in=titles)
+            .values(facet=Value('decade', CharField()),
+                    key=Cast(F('year') / 10 * 10, CharField()))
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        return genres.union(categories, decades, all=True)
+
+
+class Title(CounterFieldsModel, NameModel):
 
     year = models.IntegerField(
         verbose_name='год выпуска',
@@ -126,18 +192,44 @@ class Title(NameModel):
         blank=True,
         verbose_name='категория произведения'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='количество оценок'
+    )
+    rating = models.PositiveSmallIntegerField(
+        null=True,
+        default=None,
+        editable=False,
+        verbose_name='рейтинг'
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    COUNTER_FIELDS = ('rating_sum', 'rating_count', 'rating')
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         default_related_name = 'titles'
         ordering = ['-year', 'name']
+        indexes = [
+            models.Index(
+                fields=['-year', 'name', 'id'],
+                name='title_year_name_id_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name[:SHORT_TITLE]
 
 
-class Review(TextAndDateModel):
+class Review(CounterFieldsModel, TextAndDateModel):
 
     score = models.PositiveSmallIntegerField(
         validators=[
@@ -151,8 +243,15 @@ class Review(TextAndDateModel):
         on_delete=models.CASCADE,
         verbose_name='Произведение'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='количество комментариев'
+    )
 
-    class Meta:
+    COUNTER_FIELDS = ('comments_count',)
+
+    class Meta(TextAndDateModel.Meta):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         default_related_name = 'reviews'
@@ -162,6 +261,23 @@ class Review(TextAndDateModel):
                 name='unique_title_review_'
             )
         ]
+        # Списки отзывов произведения и удаление отзывов пользователя.
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'title'],
+                name='review_author_title_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_score = instance.__dict__.get('score')
+        return instance
 
 
 class Comment(TextAndDateModel):
@@ -172,7 +288,48 @@ class Comment(TextAndDateModel):
         verbose_name='Отзыв'
     )
 
-    class Meta:
+    class Meta(TextAndDateModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date_id_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку командой send_emails."""
+
+    recipient = models.EmailField(
+        max_length=MAX_LENGTH_EMAIL,
+        verbose_name='получатель'
+    )
+    subject = models.CharField(max_length=MAX_FIELD_NAME, verbose_name='тема')
+    message = models.TextField(verbose_name='текст письма')
+    created = models.DateTimeField(auto_now_add=True, verbose_name='создано')
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='отправить после'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='неудачных попыток'
+    )
+    last_error = models.TextField(blank=True, verbose_name='последняя ошибка')
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ['send_after', 'id']
+        indexes = [
+            models.Index(
+                fields=['send_after', 'id'],
+                name='outgoing_email_send_after_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject[:SHORT_TITLE]}'
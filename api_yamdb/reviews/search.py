@@ -0,0 +1,106 @@
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'reviews_title_fts'
+
+TOKEN_REGEX = r'\w+'
+
+
+class SearchRank(Func):
+    """rank записи индекса для запроса MATCH: SearchRank(запрос, pk).
+    Первичный ключ подставляется с псевдонимом внешнего запроса, поэтому
+    выборку можно использовать и как подзапрос."""
+
+    template = (
+        f'(SELECT rank FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %(expressions)s)'
+    )
+    arg_joiner = ' AND rowid = '
+    output_field = FloatField()
+
+
+def is_search_index_supported():
+    """Полнотекстовый индекс FTS5 поддерживается только в SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def create_search_index(**kwargs):
+    if not is_search_index_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} '
+            'USING fts5(name, description, '
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def index_title(title):
+    if not is_search_index_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {SEARCH_TABLE} '
+            '(rowid, name, description) VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description]
+        )
+
+
+def unindex_title(title_id):
+    if not is_search_index_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [title_id]
+        )
+
+
+def rebuild_search_index():
+    """Заново заполняет индекс по таблице произведений."""
+    from reviews.models import Title
+
+    create_search_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, name, description) '
+            f'SELECT id, name, description FROM {Title._meta.db_table}'
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def get_match_query(value):
+    """Превращает пользовательский ввод в безопасный запрос FTS5:
+    все слова обязательны и ищутся по префиксу."""
+    return ' '.join(f'"{token}"*' for token in re.findall(TOKEN_REGEX, value))
+
+
+def search_titles(queryset, value):
+    """Отбирает произведения по названию и описанию; в SQLite результат
+    упорядочен по релевантности."""
+    match = get_match_query(value)
+    if not match:
+        return queryset
+    if not is_search_index_supported():
+        condition = Q()
+        for token in re.findall(TOKEN_REGEX, value):
+            condition &= (
+                Q(name__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset.filter(condition)
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            [match]
+        )
+    ).annotate(
+        search_rank=SearchRank(Value(match), F('pk'))
+    ).order_by('search_rank', 'id')
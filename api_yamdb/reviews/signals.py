@@ -0,0 +1,109 @@
+from threading import local
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from reviews.models import Comment, Review, Title, User
+from reviews.search import index_title, unindex_title
+
+# Отзывы, счётчики комментариев которых не нужно уменьшать при удалении
+# каждого комментария: отзыв удаляется сам или счётчик уже уменьшен
+# одним запросом.
+_skipped = local()
+
+
+def get_skipped_review_ids():
+    return _skipped.__dict__.setdefault('review_ids', set())
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге произведения."""
+    score = int(instance.score)
+    if created:
+        Title.objects.update_rating(instance.title_id, score, 1)
+    else:
+        loaded_score = getattr(instance, 'loaded_score', None)
+        if loaded_score is None or int(loaded_score) == score:
+            return
+        Title.objects.update_rating(
+            instance.title_id, score - int(loaded_score), 0
+        )
+    instance.loaded_score = score
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга произведения."""
+    Title.objects.update_rating(instance.title_id, -int(instance.score), -1)
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, **kwargs):
+    """Учитывает новый комментарий в счётчике отзыва."""
+    if created:
+        Review.objects.filter(pk=instance.review_id).update(
+            comments_count=F('comments_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    """При каскадном удалении отзыва, произведения или автора
+    комментарии удаляются по одному, поэтому счётчики таких отзывов
+    обрабатываются в pre_delete."""
+    if instance.review_id in get_skipped_review_ids():
+        return
+    Review.objects.filter(pk=instance.review_id).update(
+        comments_count=F('comments_count') - 1
+    )
+
+
+@receiver(pre_delete, sender=Review)
+def skip_comments_count_of_deleted_review(sender, instance, **kwargs):
+    get_skipped_review_ids().add(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def forget_deleted_review(sender, instance, **kwargs):
+    get_skipped_review_ids().discard(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def update_comments_count_on_author_delete(sender, instance, **kwargs):
+    """Уменьшает одним запросом счётчики чужих отзывов, которые
+    комментировал удаляемый пользователь."""
+    reviews = Review.objects.filter(
+        pk__in=instance.comments.values('review')
+    ).exclude(author=instance)
+    review_ids = set(reviews.values_list('pk', flat=True))
+    if not review_ids:
+        return
+    instance.skipped_review_ids = review_ids
+    get_skipped_review_ids().update(review_ids)
+    reviews.update(comments_count=F('comments_count') - Subquery(
+        instance.comments.filter(review=OuterRef('pk'))
+        .order_by()
+        .values('review')
+        .annotate(total=Count('pk'))
+        .values('total')
+    ))
+
+
+@receiver(post_delete, sender=User)
+def forget_author_reviews(sender, instance, **kwargs):
+    get_skipped_review_ids().difference_update(
+        getattr(instance, 'skipped_review_ids', ())
+    )
+
+
+@receiver(post_save, sender=Title)
+def update_search_index(sender, instance, **kwargs):
+    """Обновляет запись произведения в полнотекстовом индексе."""
+    index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def delete_from_search_index(sender, instance, **kwargs):
+    unindex_title(instance.pk)
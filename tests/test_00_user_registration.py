@@ -1,7 +1,9 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 from django.core import mail
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 from tests.utils import (invalid_data_for_user_patch_and_creation,
                          invalid_data_for_username_and_email_fields)
@@ -109,6 +111,11 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.URL_SIGNUP, data=valid_data)
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к эндпоинту `{self.URL_SIGNUP}` '
+            'ставит письмо в очередь, а не отправляет его сам.'
+        )
+        call_command('send_emails', once=True, stdout=StringIO())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
@@ -372,3 +379,24 @@ class Test00UserRegistration:
             'пользователя, созданного администратором,  возвращает ответ '
             'со статусом 200.'
         )
+
+    def test_obtained_token_authenticates(self, client, django_user_model):
+        valid_data = {
+            'email': 'test_email@yamdb.fake',
+            'username': 'valid_username_1'
+        }
+        client.post(self.URL_SIGNUP, data=valid_data)
+        user = django_user_model.objects.get(username='valid_username_1')
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code
+        })
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(
+            '/api/v1/users/me/',
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что токен, полученный от `{self.URL_TOKEN}`, '
+            'позволяет обращаться к API.'
+        )
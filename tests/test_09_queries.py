@@ -0,0 +1,236 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import create_titles
+
+
+def count_queries(client, url, data=None, method='get'):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    assert response.status_code in (HTTPStatus.OK, HTTPStatus.CREATED), (
+        f'Проверьте, что запрос к `{url}` выполняется успешно.'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_titles_list_constant_queries(self, client, admin_client):
+        from reviews.models import Category, Genre, Title
+
+        _, categories, genres = create_titles(admin_client)
+        category = Category.objects.get(slug=categories[0]['slug'])
+        genres = list(Genre.objects.all())
+        for idx in range(30):
+            title = Title.objects.create(
+                name=f'Произведение {idx}', year=2000,
+                description='описание', category=category
+            )
+            title.genre.set(genres)
+
+        small_page = count_queries(client, self.TITLES_URL, {'limit': 2})
+        large_page = count_queries(client, self.TITLES_URL, {'limit': 500})
+        assert small_page == large_page == 3, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` выполняет '
+            'постоянное число SQL-запросов независимо от размера страницы: '
+            'подсчёт, выборка произведений с категориями и загрузка жанров.'
+        )
+
+    def test_02_title_write_response_queries(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        slugs = [genre['slug'] for genre in genres]
+        data = {
+            'name': 'Новое произведение',
+            'year': 2001,
+            'category': categories[0]['slug'],
+            'description': 'описание'
+        }
+        for genres_count in (1, len(slugs)):
+            data['genre'] = slugs[:genres_count]
+            title_id = admin_client.post(self.TITLES_URL, data=data).json()[
+                'id'
+            ]
+            for method, url in (
+                ('post', self.TITLES_URL),
+                ('patch', self.TITLES_DETAIL_URL_TEMPLATE.format(
+                    title_id=title_id
+                )),
+            ):
+                assert count_queries(
+                    admin_client, url, data, method=method
+                ) == 10, (
+                    f'Проверьте, что {method.upper()}-запрос к `{url}` с '
+                    f'жанрами ({genres_count}) выполняет 10 SQL-запросов: '
+                    'жанры и категория находятся по слагам одним запросом '
+                    'каждые, а жанры ответа не загружаются по одному.'
+                )
+        data['genre'] = [slugs[0], 'unknown-genre']
+        response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'genre' in response.json(), (
+            'Проверьте, что несуществующий жанр отклоняется при '
+            'валидации.'
+        )
+
+    def test_03_review_create_queries(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_user"' not in query['sql']
+        ]
+        assert len(selects) == 1 and 'reviews_title' in selects[0], (
+            f'Проверьте, что POST-запрос к `{url}` загружает произведение '
+            'один раз и не проверяет наличие отзыва отдельным запросом: '
+            'повтор отклоняется ограничением уникальности.'
+        )
+
+        response = admin_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв пользователя на произведение '
+            'возвращает ответ со статусом 400.'
+        )
+        assert response.json() == {'non_field_errors': ['Отзыв уже оставлен']}
+
+    def test_04_reviews_and_comments_list_constant_queries(self, client,
+                                                           admin_client):
+        from reviews.models import Comment, Review, User
+
+        titles, _, _ = create_titles(admin_client)
+        User.objects.bulk_create(
+            User(username=f'author_{idx}', email=f'author_{idx}@yamdb.fake')
+            for idx in range(30)
+        )
+        authors = User.objects.filter(username__startswith='author_')
+        for author in authors:
+            Review.objects.create(
+                title_id=titles[0]['id'], author=author, text='Отзыв', score=5
+            )
+        review = Review.objects.filter(title_id=titles[0]['id']).first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for author in authors
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        for url in (reviews_url, comments_url):
+            for params in ({}, {'cursor': ''}):
+                small_page = count_queries(client, url, {**params, 'limit': 2})
+                large_page = count_queries(
+                    client, url, {**params, 'limit': 500}
+                )
+                assert small_page == large_page <= 2, (
+                    f'Проверьте, что GET-запрос к `{url}` загружает авторов '
+                    'в том же запросе, что и сами объекты, и выполняет '
+                    'постоянное число SQL-запросов независимо от размера '
+                    'страницы.'
+                )
+
+    def test_05_nested_parent_lookups(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(reviews_url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что список отзывов существующего произведения без '
+            'отзывов возвращает ответ со статусом 200.'
+        )
+        missing_title = max(title['id'] for title in titles) + 1
+        response = client.get(f'/api/v1/titles/{missing_title}/reviews/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что список отзывов несуществующего произведения '
+            'возвращает ответ со статусом 404.'
+        )
+
+        review_id = admin_client.post(
+            reviews_url, data={'text': 'Отзыв', 'score': 5}
+        ).json()['id']
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(comments_url, data={'text': 'Да'})
+        assert response.status_code == HTTPStatus.CREATED
+        review_selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_selects) == 1, (
+            f'Проверьте, что POST-запрос к `{comments_url}` загружает отзыв '
+            'один раз.'
+        )
+        other_title_url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review_id}/comments/'
+        )
+        assert client.get(other_title_url).status_code == (
+            HTTPStatus.NOT_FOUND
+        ), (
+            'Проверьте, что комментарии отзыва запрашиваются только по '
+            'адресу его произведения.'
+        )
+        assert count_queries(client, comments_url) == 2, (
+            f'Проверьте, что GET-запрос к `{comments_url}` не загружает '
+            'отзыв и произведение отдельными запросами.'
+        )
+
+    def test_06_signup_queries(self, client, django_user_model):
+        url = '/api/v1/auth/signup/'
+        data = {'username': 'signup_user', 'email': 'signup_user@yamdb.fake'}
+
+        def get_statements(data):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(url, data=data)
+            return response, [
+                query['sql'].split()[0] for query in context.captured_queries
+                if query['sql'].split()[0] in ('SELECT', 'INSERT', 'UPDATE')
+            ]
+
+        response, statements = get_statements(data)
+        assert response.status_code == HTTPStatus.OK
+        assert statements == ['SELECT', 'INSERT', 'INSERT'], (
+            f'Проверьте, что POST-запрос к `{url}` нового пользователя '
+            'ищет пользователя одним запросом, а затем создаёт его и '
+            'письмо с кодом подтверждения.'
+        )
+        code = django_user_model.objects.get(
+            username=data['username']
+        ).confirmation_code
+
+        response, statements = get_statements(data)
+        assert response.status_code == HTTPStatus.OK
+        assert statements == ['SELECT', 'UPDATE', 'INSERT'], (
+            f'Проверьте, что повторный POST-запрос к `{url}` меняет код '
+            'подтверждения одним UPDATE.'
+        )
+        assert django_user_model.objects.get(
+            username=data['username']
+        ).confirmation_code != code
+
+        response, statements = get_statements(
+            {'username': data['username'], 'email': 'other@yamdb.fake'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert statements == ['SELECT'], (
+            f'Проверьте, что POST-запрос к `{url}` с занятым username '
+            'проверяется одним запросом.'
+        )
+
+    def test_07_review_create_other_integrity_errors(self, admin):
+        from django.db import IntegrityError
+
+        from api.serializers import ReviewSerializer
+        from reviews.models import Title
+
+        serializer = ReviewSerializer(data={'text': 'Отзыв', 'score': 7})
+        assert serializer.is_valid()
+        with pytest.raises(IntegrityError):
+            serializer.save(title=Title(pk=10 ** 6), author=admin)
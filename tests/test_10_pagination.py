@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from tests.utils import create_reviews, create_titles
+
+
+def walk_pages(client, url):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` с параметром `cursor` '
+            'возвращает ответ со статусом 200.'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в режиме курсора ответ не содержит ключ `count`.'
+        )
+        pages.append(data)
+        url = data['next']
+    return pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_titles_cursor(self, client, admin_client):
+        from reviews.models import Title
+
+        create_titles(admin_client)
+        for idx in range(7):
+            Title.objects.create(
+                name=f'Произведение {idx % 3}', year=1984,
+                description='описание'
+            )
+        expected = list(
+            Title.objects.order_by('-year', 'name', 'id')
+            .values_list('id', flat=True)
+        )
+
+        pages = walk_pages(client, f'{self.TITLES_URL}?cursor=&limit=2')
+        ids = [item['id'] for page in pages for item in page['results']]
+        assert ids == expected, (
+            f'Проверьте, что режим курсора для `{self.TITLES_URL}` '
+            'возвращает все произведения без пропусков и повторов в порядке '
+            '`-year, name, id`.'
+        )
+        assert pages[0]['previous'] is None
+
+        previous_page = client.get(pages[-1]['previous']).json()
+        assert previous_page['results'] == pages[-2]['results'], (
+            'Проверьте, что ссылка `previous` в режиме курсора ведёт на '
+            'предыдущую страницу.'
+        )
+
+        response = client.get(f'{self.TITLES_URL}?limit=2')
+        assert response.json()['count'] == len(expected), (
+            'Проверьте, что без параметра `cursor` сохраняется пагинация '
+            'limit/offset.'
+        )
+
+    def test_02_reviews_cursor(self, client, admin_client, admin, user,
+                               user_client, moderator, moderator_client):
+        from reviews.models import Review
+
+        authors_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        _, titles = create_reviews(admin_client, authors_map)
+        Review.objects.update(pub_date=Review.objects.first().pub_date)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        expected = list(
+            Review.objects.filter(title=titles[0]['id'])
+            .order_by('-pub_date', 'id').values_list('id', flat=True)
+        )
+
+        pages = walk_pages(client, f'{url}?cursor=&limit=1')
+        ids = [item['id'] for page in pages for item in page['results']]
+        assert ids == expected, (
+            f'Проверьте, что режим курсора для `{self.REVIEWS_URL_TEMPLATE}` '
+            'корректно обрабатывает отзывы с одинаковой датой публикации.'
+        )
+
+        response = client.get(f'{url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что некорректный курсор приводит к ответу со '
+            'статусом 404.'
+        )
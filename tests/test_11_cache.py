@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitlesCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def get_without_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not context.captured_queries, (
+            f'Проверьте, что повторный GET-запрос анонимного пользователя к '
+            f'`{url}` обслуживается из кэша без обращений к базе данных.'
+        )
+        return response.json()
+
+    def test_01_anonymous_reads_are_cached(self, client, admin_client,
+                                           user_client):
+        titles, categories, _ = create_titles(admin_client)
+        list_url = f'{self.TITLES_URL}?offset=0&limit=5'
+        detail_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        expected_list = client.get(list_url).json()
+        expected_detail = client.get(detail_url).json()
+        assert self.get_without_queries(
+            client, f'{self.TITLES_URL}?limit=5&offset=0'
+        ) == expected_list, (
+            'Проверьте, что ключ кэша не зависит от порядка параметров '
+            'запроса.'
+        )
+        assert self.get_without_queries(client, detail_url) == (
+            expected_detail
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'текст', 9)
+        assert client.get(detail_url).json()['rating'] == 9, (
+            'Проверьте, что создание отзыва сбрасывает кэш произведений.'
+        )
+
+        admin_client.patch(detail_url, data={'name': 'Новое название'})
+        assert client.get(detail_url).json()['name'] == 'Новое название', (
+            'Проверьте, что изменение произведения сбрасывает кэш '
+            'произведений.'
+        )
+
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        assert client.get(detail_url).json()['category'] is None, (
+            'Проверьте, что удаление категории сбрасывает кэш произведений.'
+        )
+
+    def test_02_file_based_cache(self, client, admin_client, settings,
+                                 tmp_path):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': str(tmp_path / 'responses'),
+            },
+            'generations': {
+                'BACKEND': 'api.cache.GenerationsFileCache',
+                'LOCATION': str(tmp_path / 'generations'),
+            },
+        }
+        titles, _, _ = create_titles(admin_client)
+        expected = client.get(self.TITLES_URL).json()
+        assert self.get_without_queries(client, self.TITLES_URL) == expected
+
+        admin_client.delete(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert client.get(self.TITLES_URL).json()['count'] == (
+            len(titles) - 1
+        ), 'Проверьте, что удаление произведения сбрасывает кэш.'
@@ -0,0 +1,208 @@
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.fixture
+def seconds_later(monkeypatch):
+    """Запросы выполняются через две секунды после изменения данных."""
+    from time import time
+
+    monkeypatch.setattr('api.mixins.time', lambda: time() + 2)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        assert response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `Last-Modified`.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert not context.captured_queries, (
+            f'Проверьте, что ответ 304 на GET-запрос к `{url}` формируется '
+            'без обращений к базе данных.'
+        )
+        return etag
+
+    def test_01_all_collections(self, client, admin_client, admin, user,
+                                user_client, moderator, moderator_client,
+                                seconds_later):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        urls = (
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        )
+        etags = {url: self.check_not_modified(client, url) for url in urls}
+
+        comments_url = urls[-1]
+        create_single_comment(user_client, title_id, review_id, 'новый')
+        response = client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etags[comments_url]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления комментария устаревший `ETag` '
+            'не приводит к ответу со статусом 304.'
+        )
+        assert len(response.json()['results']) == len(comments) + 1
+
+        reviews_url = urls[4]
+        response = client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что добавление комментария меняет `ETag` списка '
+            'отзывов: отзывы содержат число комментариев.'
+        )
+        titles_url = urls[2]
+        response = client.get(
+            titles_url, HTTP_IF_NONE_MATCH=etags[titles_url]
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что добавление комментария не меняет `ETag` списка '
+            'произведений.'
+        )
+
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        response = client.get(
+            urls[1], HTTP_IF_NONE_MATCH=etags[urls[1]]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления жанра устаревший `ETag` не '
+            'приводит к ответу со статусом 304.'
+        )
+
+    def test_02_if_modified_since(self, client, admin_client,
+                                  seconds_later):
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+        )
+        response = client.get('/api/v1/categories/')
+        response = client.get(
+            '/api/v1/categories/',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что GET-запрос с актуальным `If-Modified-Since` '
+            'возвращает ответ со статусом 304.'
+        )
+
+    def test_03_generations_shared_between_processes(self, client,
+                                                     settings, tmp_path):
+        settings.CACHES = {
+            **settings.CACHES,
+            'generations': {
+                'BACKEND': 'api.cache.GenerationsFileCache',
+                'LOCATION': str(tmp_path),
+            },
+        }
+        url = '/api/v1/genres/'
+        etag = client.get(url)['ETag']
+        subprocess.run(
+            [sys.executable, '-c', (
+                'import django; django.setup(); '
+                'from api.cache import bump_generation; '
+                'bump_generation("genres")'
+            )],
+            check=True,
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+                'GENERATIONS_CACHE_DIR': str(tmp_path),
+            },
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что поколения данных хранятся в кэше, общем для '
+            'всех процессов: запись в другом процессе должна делать '
+            'устаревшим `ETag`.'
+        )
+
+    def test_04_write_in_same_second(self, client, admin_client):
+        url = '/api/v1/categories/'
+        admin_client.post(url, data={'name': 'Фильм', 'slug': 'films'})
+        assert 'Last-Modified' not in client.get(url), (
+            'Проверьте, что `Last-Modified` не отдаётся, пока не закончилась '
+            'секунда последнего изменения данных.'
+        )
+        admin_client.post(url, data={'name': 'Книга', 'slug': 'books'})
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=http_date())
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что запись в ту же секунду, что и предыдущий '
+            'ответ, не приводит к ответу со статусом 304.'
+        )
+
+    def test_05_generations_not_evicted(self, settings, tmp_path):
+        from api.cache import (bump_generation, get_epoch, get_generation,
+                               get_generations_cache)
+
+        settings.CACHES = {
+            **settings.CACHES,
+            'generations': {
+                **settings.CACHES['generations'],
+                'LOCATION': str(tmp_path),
+            },
+        }
+        generations = get_generations_cache()
+        epoch = get_epoch(generations)
+        first = get_generation('reviews:0')
+        max_entries = generations._max_entries
+        for title_id in range(1, max_entries + 100):
+            bump_generation(f'reviews:{title_id}')
+        assert get_epoch(generations) == epoch and (
+            get_generation('reviews:0') == first
+        ), (
+            'Проверьте, что кэш поколений не вытесняет эпоху и поколения '
+            'пространств имён.'
+        )
+
+    def test_06_lost_epoch_is_logged(self, caplog):
+        from api.cache import get_epoch, get_generations_cache
+
+        generations = get_generations_cache()
+        epoch = get_epoch(generations)
+        caplog.clear()
+        assert get_epoch(generations) == epoch and not caplog.records
+        generations.clear()
+        with caplog.at_level('WARNING', logger='api.cache'):
+            new_epoch = get_epoch(generations)
+        assert new_epoch != epoch and any(
+            'Эпоха' in record.getMessage() for record in caplog.records
+        ), (
+            'Проверьте, что потеря эпохи кэша поколений записывается в '
+            'журнал и начинает новую эпоху.'
+        )
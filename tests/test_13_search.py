@@ -0,0 +1,87 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`search` возвращает ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_name_and_description(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'терминатор') == [titles[0]['name']], (
+            'Проверьте, что поиск по названию не зависит от регистра.'
+        )
+        assert self.search(client, 'yippie') == [titles[1]['name']], (
+            'Проверьте, что поиск выполняется и по описанию произведения.'
+        )
+        assert self.search(client, 'Крепк') == [titles[1]['name']], (
+            'Проверьте, что поиск выполняется по префиксу слова.'
+        )
+        assert len(self.search(client, '"(*')) == len(titles), (
+            'Проверьте, что запрос без слов не ограничивает выборку.'
+        )
+
+        admin_client.patch(
+            f'{self.TITLES_URL}{titles[0]["id"]}/',
+            data={'name': 'Робокоп'}
+        )
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'робокоп') == ['Робокоп'], (
+            'Проверьте, что индекс обновляется при изменении произведения.'
+        )
+
+        admin_client.delete(f'{self.TITLES_URL}{titles[1]["id"]}/')
+        assert self.search(client, 'yippie') == [], (
+            'Проверьте, что произведение удаляется из индекса.'
+        )
+
+    def test_02_rebuild_search_index(self, client, admin_client):
+        from django.core.cache import cache
+        from django.db import connection
+        from reviews.search import SEARCH_TABLE
+
+        titles, _, _ = create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cache.clear()
+        assert self.search(client, 'терминатор') == []
+
+        call_command('rebuild_search_index')
+        cache.clear()
+        assert self.search(client, 'терминатор') == [titles[0]['name']], (
+            'Проверьте, что команда `rebuild_search_index` заполняет индекс.'
+        )
+
+    def test_03_ranked_and_usable_as_subquery(self, client):
+        from reviews.models import Title
+        from reviews.search import search_titles
+
+        Title.objects.create(
+            name='Хроники', year=2000,
+            description='Про дракона и рыцаря, замок и долгую осаду.'
+        )
+        Title.objects.create(
+            name='Дракон', year=2000, description='Дракон против дракона.'
+        )
+        assert self.search(client, 'дракон') == ['Дракон', 'Хроники'], (
+            'Проверьте, что результаты поиска упорядочены по релевантности.'
+        )
+        found = search_titles(Title.objects.all(), 'дракон')
+        assert not Title.genre.through.objects.filter(
+            title_id__in=found.order_by().values('pk')
+        ).exists(), (
+            'Проверьте, что отфильтрованную поиском выборку можно '
+            'использовать как подзапрос.'
+        )
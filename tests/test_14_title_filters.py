@@ -0,0 +1,54 @@
+from http import HTTPStatus
+
+import pytest
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def filter_names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == HTTPStatus.OK
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_genre_and_category_filters(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        terminator, die_hard = titles[0]['name'], titles[1]['name']
+
+        assert self.filter_names(client, genre='horr') == [], (
+            'Проверьте, что фильтр `genre` сравнивает слаг целиком.'
+        )
+        assert self.filter_names(
+            client, genre=f'{genres[0]["slug"]},{genres[1]["slug"]}'
+        ) == [terminator], (
+            'Проверьте, что фильтр `genre` со списком слагов не дублирует '
+            'произведения, подходящие под несколько жанров.'
+        )
+        assert self.filter_names(
+            client, genre=f'{genres[1]["slug"]},{genres[2]["slug"]}'
+        ) == sorted([terminator, die_hard]), (
+            'Проверьте, что фильтр `genre` принимает несколько слагов через '
+            'запятую.'
+        )
+        assert self.filter_names(
+            client, category=f'{categories[1]["slug"]},unknown'
+        ) == [die_hard], (
+            'Проверьте, что фильтр `category` принимает несколько слагов '
+            'через запятую.'
+        )
+        assert self.filter_names(client, category='unknown') == []
+
+    def test_02_year_range_filter(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.filter_names(client, year_min=1985) == [
+            titles[1]['name']
+        ], 'Проверьте работу фильтра `year_min`.'
+        assert self.filter_names(client, year_max=1985) == [
+            titles[0]['name']
+        ], 'Проверьте работу фильтра `year_max`.'
+        assert self.filter_names(client, year_min=1984, year_max=1988) == (
+            sorted(title['name'] for title in titles)
+        ), 'Проверьте, что границы диапазона годов включаются в выборку.'
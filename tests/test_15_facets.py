@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15TitleFacets:
+
+    FACETS_URL = '/api/v1/titles/facets/'
+
+    def test_01_facets(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.FACETS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.FACETS_URL}` возвращает '
+            'ответ со статусом 200.'
+        )
+        assert len(context.captured_queries) == 1, (
+            f'Проверьте, что `{self.FACETS_URL}` считает все фасеты одним '
+            'SQL-запросом.'
+        )
+        data = response.json()
+        assert sorted(data['genre'], key=lambda item: item['slug']) == [
+            {'slug': genre['slug'], 'count': 1}
+            for genre in sorted(genres, key=lambda item: item['slug'])
+        ]
+        assert {item['slug'] for item in data['category']} == {
+            category['slug'] for category in categories
+        }
+        assert data['decade'] == [{'decade': 1980, 'count': len(titles)}]
+
+        response = client.get(
+            self.FACETS_URL, {'category': categories[0]['slug']}
+        )
+        data = response.json()
+        assert data['category'] == [
+            {'slug': categories[0]['slug'], 'count': 1}
+        ], (
+            f'Проверьте, что `{self.FACETS_URL}` учитывает фильтры '
+            'произведений.'
+        )
+        assert {item['slug'] for item in data['genre']} == set(
+            titles[0]['genre']
+        )
+
+    def test_02_facets_cache_invalidation(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get(self.FACETS_URL)
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.FACETS_URL)
+        assert not context.captured_queries, (
+            f'Проверьте, что ответ `{self.FACETS_URL}` кэшируется.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        data = client.get(self.FACETS_URL).json()
+        assert data['decade'] == [{'decade': 1980, 'count': 1}], (
+            'Проверьте, что удаление произведения сбрасывает кэш фасетов.'
+        )
+
+    def test_03_facets_with_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.FACETS_URL, {'search': 'терминатор'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.FACETS_URL}` работает с параметром '
+            '`search`.'
+        )
+        assert sorted(
+            response.json()['genre'], key=lambda item: item['slug']
+        ) == [
+            {'slug': slug, 'count': 1} for slug in sorted(titles[0]['genre'])
+        ] and response.json()['decade'] == [{'decade': 1980, 'count': 1}], (
+            f'Проверьте, что `{self.FACETS_URL}` считает только найденные '
+            'произведения.'
+        )
@@ -0,0 +1,316 @@
+import csv
+import os
+import sqlite3
+import subprocess
+import sys
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def count_rows(file):
+    from reviews.constants import PATH_TO_DATA
+
+    with open(os.path.join(PATH_TO_DATA, file), encoding='utf-8') as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ImportCommand:
+
+    def test_01_add_file_in_db(self, client):
+        from reviews.constants import FILES
+        from reviews.models import Comment, Review, Title, User
+
+        out = StringIO()
+        call_command('add_file_in_db', batch_size=7, stdout=out)
+        expected = {
+            User: FILES['users'],
+            Title: FILES['titles'],
+            Review: FILES['review'],
+            Comment: FILES['comments'],
+        }
+        for model, file in expected.items():
+            assert model.objects.count() == count_rows(file), (
+                f'Проверьте, что команда `add_file_in_db` загружает все '
+                f'строки файла {file}.'
+            )
+        assert Title.genre.through.objects.count() == count_rows(
+            FILES['genre_title']
+        )
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что команда `add_file_in_db` сообщает скорость '
+            'загрузки каждого файла.'
+        )
+
+        title = Title.objects.filter(reviews__isnull=False).first()
+        scores = list(title.reviews.values_list('score', flat=True))
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] == sum(scores) // len(scores), (
+            'Проверьте, что после загрузки рейтинги произведений '
+            'пересчитываются.'
+        )
+
+    def test_02_add_file_in_db_partitions(self):
+        from reviews.constants import FILES, PATH_TO_DATA
+        from reviews.management.commands.add_file_in_db import (LOAD_PLAN,
+                                                                get_partitions,
+                                                                read_rows)
+        from reviews.models import Review
+
+        partitions = get_partitions(PATH_TO_DATA, 'review', 10)
+        rows = count_rows(FILES['review'])
+        path = os.path.join(PATH_TO_DATA, FILES['review'])
+        assert partitions[-1][3] == os.path.getsize(path)
+        assert all(
+            previous[3] == current[2]
+            for previous, current in zip(partitions, partitions[1:])
+        ), 'Проверьте, что диапазоны байтов файла не пересекаются.'
+        parts = [
+            list(read_rows(path, Review, ('author',), start, stop))
+            for _, _, start, stop in partitions
+        ]
+        assert len(parts) == -(-rows // 10) and all(
+            len(part) == 10 for part in parts[:-1]
+        )
+        assert [row for part in parts for row in part] == list(
+            read_rows(path, Review, ('author',))
+        ), (
+            'Проверьте, что диапазоны не разрезают записи, значения которых '
+            'содержат переводы строк.'
+        )
+        for name, (_, _, dependencies) in LOAD_PLAN.items():
+            names = list(LOAD_PLAN)
+            assert all(
+                names.index(dependency) < names.index(name)
+                for dependency in dependencies
+            ), 'Проверьте порядок зависимостей файлов.'
+
+        err = StringIO()
+        call_command('add_file_in_db', workers=2, stdout=StringIO(),
+                     stderr=err)
+        assert Review.objects.count() == rows
+        assert 'последовательно' in err.getvalue(), (
+            'Проверьте, что для SQLite в памяти загрузка выполняется '
+            'последовательно.'
+        )
+
+    def test_03_add_file_in_db_upsert(self, tmp_path):
+        import shutil
+
+        from reviews.constants import FILES, PATH_TO_DATA
+        from reviews.models import Comment, Title
+
+        data_path = tmp_path / 'data'
+        shutil.copytree(PATH_TO_DATA, data_path)
+        options = {
+            'upsert': True,
+            'data_path': str(data_path),
+            'manifest_dir': str(tmp_path / 'manifests'),
+            'stdout': StringIO(),
+        }
+        call_command('add_file_in_db', **options)
+        assert Title.objects.count() == count_rows(FILES['titles'])
+
+        titles_path = data_path / FILES['titles']
+        lines = titles_path.read_text(encoding='utf-8').splitlines()
+        header, first, *rest = lines
+        title_id = first.split(',')[0]
+        first = first.replace(first.split(',')[1], 'Новое название', 1)
+        new_title = '1000,Новое произведение,2001,1'
+        titles_path.write_text(
+            '\n'.join([header, first, *rest[1:], new_title]) + '\n',
+            encoding='utf-8'
+        )
+        removed_id = rest[0].split(',')[0]
+        (data_path / FILES['comments']).write_text(
+            'id,review_id,text,author,pub_date\n', encoding='utf-8'
+        )
+
+        out = StringIO()
+        call_command('add_file_in_db', **{**options, 'stdout': out})
+        assert Title.objects.get(pk=title_id).name == 'Новое название', (
+            'Проверьте, что режим `--upsert` обновляет изменённые строки.'
+        )
+        assert Title.objects.filter(pk=1000).exists(), (
+            'Проверьте, что режим `--upsert` добавляет новые строки.'
+        )
+        assert not Title.objects.filter(pk=removed_id).exists(), (
+            'Проверьте, что режим `--upsert` удаляет исчезнувшие строки.'
+        )
+        assert not Comment.objects.exists()
+        report = out.getvalue()
+        assert 'обновлено: 1' in report and 'добавлено: 1' in report, (
+            'Проверьте, что режим `--upsert` записывает в базу только '
+            'изменённые строки.'
+        )
+
+    def test_04_upsert_refreshes_only_changed_rows(self, client, tmp_path):
+        import shutil
+
+        from reviews.constants import FILES, PATH_TO_DATA
+        from reviews.models import Review, Title
+
+        data_path = tmp_path / 'data'
+        shutil.copytree(PATH_TO_DATA, data_path)
+        options = {
+            'upsert': True,
+            'data_path': str(data_path),
+            'manifest_dir': str(tmp_path / 'manifests'),
+            'stdout': StringIO(),
+        }
+        call_command('add_file_in_db', **options)
+        review_path = data_path / FILES['review']
+        with open(review_path, encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        review = Review.objects.get(pk=rows[0]['id'])
+        untouched = Title.objects.exclude(pk=review.title_id).filter(
+            reviews__isnull=False
+        ).first()
+        Title.objects.filter(pk=untouched.pk).update(rating=1)
+        etag = client.get('/api/v1/titles/')['ETag']
+
+        rows[0]['score'] = '1' if review.score != 1 else '2'
+        with open(review_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        call_command('add_file_in_db', **options)
+
+        scores = list(Review.objects.filter(
+            title_id=review.title_id
+        ).values_list('score', flat=True))
+        assert Title.objects.get(pk=review.title_id).rating == (
+            sum(scores) // len(scores)
+        ), (
+            'Проверьте, что режим `--upsert` пересчитывает рейтинги '
+            'произведений изменённых отзывов.'
+        )
+        assert Title.objects.get(pk=untouched.pk).rating == 1, (
+            'Проверьте, что режим `--upsert` не пересчитывает данные, не '
+            'затронутые изменениями.'
+        )
+        assert client.get('/api/v1/titles/')['ETag'] != etag, (
+            'Проверьте, что режим `--upsert` сбрасывает кэш ответов '
+            'изменённых данных.'
+        )
+        out = StringIO()
+        call_command('add_file_in_db', **{**options, 'stdout': out})
+        assert (
+            f'{FILES["review"]} done! без изменений: {len(rows)}, '
+            'добавлено: 0, обновлено: 0, удалено: 0'
+        ) in out.getvalue(), (
+            'Проверьте, что повторная загрузка без изменений ничего не '
+            'записывает в базу.'
+        )
+
+    def test_05_add_file_in_db_parallel_processes(self, tmp_path):
+        from django.conf import settings
+        from reviews.constants import FILES
+
+        (tmp_path / 'file_db_settings.py').write_text(
+            'from api_yamdb.settings import *  # noqa\n'
+            'DATABASES = {"default": {'
+            '"ENGINE": "django.db.backends.sqlite3", '
+            f'"NAME": {str(tmp_path / "db.sqlite3")!r}}}}}\n',
+            encoding='utf-8'
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'file_db_settings',
+            'PYTHONPATH': os.pathsep.join(
+                [str(tmp_path), str(settings.BASE_DIR)]
+            ),
+        }
+        manage = [sys.executable, str(settings.BASE_DIR / 'manage.py')]
+        subprocess.run(
+            manage + ['migrate', '--run-syncdb'],
+            cwd=settings.BASE_DIR.parent, env=env, check=True,
+            capture_output=True
+        )
+        result = subprocess.run(
+            manage + ['add_file_in_db', '--workers', '3',
+                      '--partition-size', '7'],
+            cwd=settings.BASE_DIR.parent, env=env, check=True,
+            capture_output=True, text=True
+        )
+        assert 'последовательно' not in result.stderr, (
+            'Проверьте, что для SQLite в файле файлы загружаются '
+            'параллельно в нескольких процессах.'
+        )
+        connection = sqlite3.connect(tmp_path / 'db.sqlite3')
+        try:
+            for table, file in (
+                ('reviews_user', FILES['users']),
+                ('reviews_title', FILES['titles']),
+                ('reviews_title_genre', FILES['genre_title']),
+                ('reviews_review', FILES['review']),
+                ('reviews_comment', FILES['comments']),
+            ):
+                count, = connection.execute(
+                    f'SELECT count(*) FROM {table}'
+                ).fetchone()
+                assert count == count_rows(file), (
+                    'Проверьте, что при параллельной загрузке по диапазонам '
+                    f'загружаются все строки файла {file}.'
+                )
+            unrated, = connection.execute(
+                'SELECT count(*) FROM reviews_title WHERE rating_count != '
+                '(SELECT count(*) FROM reviews_review '
+                'WHERE title_id = reviews_title.id)'
+            ).fetchone()
+        finally:
+            connection.close()
+        assert unrated == 0, (
+            'Проверьте, что после параллельной загрузки рейтинги '
+            'пересчитываются.'
+        )
+
+    def test_06_add_file_in_db_keeps_dates(self, tmp_path):
+        import shutil
+
+        from django.utils.dateparse import parse_datetime
+        from reviews.constants import FILES, PATH_TO_DATA
+        from reviews.models import Comment, Review
+
+        call_command('add_file_in_db', stdout=StringIO())
+        with open(os.path.join(PATH_TO_DATA, FILES['review']),
+                  encoding='utf-8') as f:
+            row = next(csv.DictReader(f))
+        assert Review.objects.get(pk=row['id']).pub_date == parse_datetime(
+            row['pub_date']
+        ), (
+            'Проверьте, что команда `add_file_in_db` сохраняет даты '
+            'публикации из файла.'
+        )
+        assert Comment._meta.get_field('pub_date').auto_now_add, (
+            'Проверьте, что после загрузки новым записям снова '
+            'проставляется текущая дата публикации.'
+        )
+        Review.objects.all().delete()
+
+        data_path = tmp_path / 'data'
+        shutil.copytree(PATH_TO_DATA, data_path)
+        options = {
+            'upsert': True,
+            'data_path': str(data_path),
+            'manifest_dir': str(tmp_path / 'manifests'),
+            'stdout': StringIO(),
+        }
+        call_command('add_file_in_db', **options)
+        review_path = data_path / FILES['review']
+        with open(review_path, encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        rows[0]['pub_date'] = '2020-01-02T03:04:05.000Z'
+        with open(review_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        call_command('add_file_in_db', **options)
+        assert Review.objects.get(pk=rows[0]['id']).pub_date == (
+            parse_datetime(rows[0]['pub_date'])
+        ), (
+            'Проверьте, что режим `--upsert` обновляет даты публикации из '
+            'файла.'
+        )
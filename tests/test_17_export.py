@@ -0,0 +1,85 @@
+import csv
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ExportCommand:
+
+    def test_01_export_catalog_round_trip(self, tmp_path):
+        from reviews.constants import COLUMNS, FILES, PATH_TO_DATA
+        from reviews.management.commands.add_file_in_db import LOAD_PLAN
+        from reviews.models import Title, User
+
+        call_command('add_file_in_db', stdout=StringIO())
+        out = StringIO()
+        call_command('export_catalog', str(tmp_path), chunk_size=5,
+                     workers=3, stdout=out)
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что команда `export_catalog` сообщает скорость '
+            'выгрузки каждого файла.'
+        )
+        for name, file in FILES.items():
+            exported = read_csv(tmp_path / file)
+            source = read_csv(f'{PATH_TO_DATA}/{file}')
+            assert tuple(exported[0][:len(COLUMNS[name])]) == COLUMNS[name], (
+                f'Проверьте, что заголовок файла {file} начинается со '
+                'столбцов формата команды `add_file_in_db`.'
+            )
+            assert len(exported) == len(source), (
+                f'Проверьте, что команда `export_catalog` выгружает все '
+                f'строки таблицы в файл {file}.'
+            )
+
+        expected = {
+            model: model.objects.count() for model, _, _ in LOAD_PLAN.values()
+        }
+        title = Title.objects.order_by('pk').first()
+        user = User.objects.order_by('pk').first()
+        Title.objects.filter(pk=title.pk).update(description='Описание')
+        User.objects.filter(pk=user.pk).update(password='hash')
+        call_command('export_catalog', str(tmp_path), stdout=StringIO())
+        for model, _, _ in reversed(LOAD_PLAN.values()):
+            model.objects.all().delete()
+        call_command('add_file_in_db', data_path=str(tmp_path),
+                     stdout=StringIO())
+        for model, count in expected.items():
+            assert model.objects.count() == count, (
+                'Проверьте, что выгруженные файлы загружаются обратно '
+                'командой `add_file_in_db`.'
+            )
+        assert Title.objects.get(pk=title.pk).description == 'Описание' and (
+            User.objects.get(pk=user.pk).password == 'hash'
+        ), (
+            'Проверьте, что команда `export_catalog` выгружает все поля '
+            'моделей.'
+        )
+
+    def test_02_export_catalog_ndjson_gzip(self, tmp_path):
+        from reviews.constants import FILES
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        call_command('export_catalog', str(tmp_path), gzip=True, ndjson=True,
+                     stdout=StringIO())
+        path = tmp_path / FILES['titles'].replace('.csv', '.ndjson.gz')
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert rows == [{
+            'id': title.id, 'name': 'Произведение', 'year': 2000,
+            'category': None, 'description': '', 'rating_sum': 0,
+            'rating_count': 0, 'rating': None,
+        }], (
+            'Проверьте, что с параметрами `--ndjson --gzip` строки таблицы '
+            'выгружаются в сжатый файл .ndjson.gz, а NULL - как null.'
+        )
+        assert (tmp_path / f'{FILES["titles"]}.gz').exists()
@@ -0,0 +1,74 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+OPTIONS = {
+    'users': 15, 'categories': 2, 'genres': 4, 'titles': 30,
+    'reviews': 120, 'comments': 50, 'seed': 7, 'batch_size': 16,
+}
+
+
+def get_snapshot():
+    """Отзывы с id произведений и авторов, отсчитанными от первых id."""
+    from django.db.models import Min
+
+    from reviews.models import Review, Title, User
+
+    first_title = Title.objects.aggregate(id=Min('id'))['id']
+    first_user = User.objects.aggregate(id=Min('id'))['id']
+    return [
+        (title_id - first_title, author_id - first_user, score)
+        for title_id, author_id, score in Review.objects.order_by('id')
+        .values_list('title_id', 'author_id', 'score')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18GenerateDataset:
+
+    def test_01_generate_dataset(self, client):
+        from django.db.models import Count
+
+        from reviews.models import Comment, Review, Title, User
+
+        call_command('generate_dataset', stdout=StringIO(), **OPTIONS)
+        assert User.objects.count() == OPTIONS['users']
+        assert Title.objects.count() == OPTIONS['titles']
+        assert Review.objects.count() == OPTIONS['reviews'], (
+            'Проверьте, что команда `generate_dataset` создаёт заданное '
+            'количество отзывов.'
+        )
+        assert Comment.objects.count() == OPTIONS['comments']
+        assert not Title.objects.filter(genre__isnull=True).exists()
+
+        per_title = list(
+            Title.objects.annotate(total=Count('reviews'))
+            .order_by('-total').values_list('total', flat=True)
+        )
+        assert per_title[0] > 3 * per_title[len(per_title) // 2], (
+            'Проверьте, что число отзывов на произведение распределено '
+            'неравномерно.'
+        )
+        title = Title.objects.filter(rating_count=per_title[0]).first()
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] is not None, (
+            'Проверьте, что после генерации рейтинги произведений '
+            'пересчитываются.'
+        )
+
+        snapshot = get_snapshot()
+        for model in (Comment, Review, Title):
+            model.objects.all().delete()
+        User.objects.all().delete()
+        call_command('generate_dataset', stdout=StringIO(), **OPTIONS)
+        assert get_snapshot() == snapshot, (
+            'Проверьте, что команда `generate_dataset` с одним и тем же '
+            'зерном генерирует одинаковые данные.'
+        )
+
+    def test_02_generate_dataset_capacity(self):
+        options = {**OPTIONS, 'reviews': 1000}
+        with pytest.raises(CommandError):
+            call_command('generate_dataset', stdout=StringIO(), **options)
@@ -0,0 +1,64 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Benchmark:
+
+    def test_01_benchmark_baseline(self, tmp_path):
+        from reviews.models import User
+
+        call_command(
+            'generate_dataset', users=10, titles=10, reviews=40, comments=20,
+            stdout=StringIO()
+        )
+        users = User.objects.count()
+        baseline = tmp_path / 'baseline.json'
+        options = {'iterations': 2, 'warmup': 0, 'baseline': str(baseline)}
+
+        out = StringIO()
+        call_command('benchmark', stdout=out, **options)
+        results = json.loads(baseline.read_text(encoding='utf-8'))['results']
+        for name in ('titles_list', 'titles_facets', 'reviews_list',
+                     'comments_list', 'users_search', 'auth_signup',
+                     'auth_token'):
+            assert name in results, (
+                f'Проверьте, что бенчмарк замеряет сценарий `{name}`.'
+            )
+        assert set(results['title_detail']) == {
+            'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'alloc_kb'
+        }
+        assert results['titles_list_cached']['queries'] == 0, (
+            'Проверьте, что повторный анонимный запрос списка произведений '
+            'отдаётся из кэша.'
+        )
+        assert User.objects.count() == users, (
+            'Проверьте, что бенчмарк не оставляет в базе созданных данных.'
+        )
+
+        out = StringIO()
+        call_command('benchmark', stdout=out, no_save=True, **options)
+        assert 'titles_list: p95' in out.getvalue(), (
+            'Проверьте, что бенчмарк сравнивает результаты с базовым '
+            'замером.'
+        )
+
+        baseline_data = json.loads(baseline.read_text(encoding='utf-8'))
+        baseline_data['results']['title_detail']['queries'] = 0
+        baseline.write_text(json.dumps(baseline_data), encoding='utf-8')
+        with pytest.raises(CommandError):
+            call_command(
+                'benchmark', stdout=StringIO(), no_save=True,
+                fail_on_regression=True, only=['title_detail'], **options
+            )
+
+    def test_02_benchmark_without_data(self, tmp_path):
+        with pytest.raises(CommandError):
+            call_command(
+                'benchmark', stdout=StringIO(), iterations=2,
+                baseline=str(tmp_path / 'baseline.json')
+            )
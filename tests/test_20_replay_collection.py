@@ -0,0 +1,71 @@
+import json
+import re
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ReplayCollection:
+
+    def test_01_collection_steps(self):
+        from django.conf import settings
+
+        from api.management.commands.replay_collection import (get_steps,
+                                                               make_unique)
+
+        with open(settings.POSTMAN_COLLECTION, encoding='utf-8') as f:
+            steps = list(get_steps(json.load(f)['item']))
+        token_step = next(
+            step for step in steps if step.name == 'get_token_for_admin'
+        )
+        assert token_step.expected_status == 200
+        assert token_step.extract == (('adminToken', 'token'),), (
+            'Проверьте, что из тестовых скриптов коллекции извлекаются '
+            'сохраняемые в переменные поля ответа.'
+        )
+        assert all(
+            step.token for step in steps
+            if step.name.startswith('create_title_without_name')
+        ), (
+            'Проверьте, что запрос без своей авторизации наследует её от '
+            'папки коллекции.'
+        )
+        assert make_unique('email', 'user@no-admin.ru', '1') == (
+            'user-1@no-admin.ru'
+        )
+        assert make_unique('username', 'me', '1') == 'me'
+        assert make_unique('username', 'InvalidU$ername', '1') == (
+            'InvalidU$ername'
+        )
+
+    def test_02_replay_collection(self):
+        out, err = StringIO(), StringIO()
+        call_command('replay_collection', users=2, stdout=out, stderr=err)
+        report = out.getvalue()
+        assert 'запросов/с' in report, (
+            'Проверьте, что команда `replay_collection` сообщает пропускную '
+            'способность.'
+        )
+        assert re.search(r'get_token_for_admin\s+2\s', report), (
+            'Проверьте, что каждый виртуальный пользователь проходит '
+            'коллекцию целиком.'
+        )
+        assert 'последовательно' in err.getvalue()
+        mismatched = {
+            line.rsplit(None, 5)[0] for line in report.splitlines()
+            if re.search(r'\s\d+(?:\s+\d+\.\d+){3}\s+[1-9]\d*$', line)
+        }
+        # Известные отличия API от коллекции: описание произведения
+        # обязательно (поэтому нечего и удалять), а PATCH с прежним
+        # username пользователя отклоняется.
+        assert mismatched == {
+            'patch_user_role // Superuser',
+            'create_title_only_required_fields // Admin',
+            'delete_short_title // Admin',
+        }, (
+            'Проверьте, что виртуальные пользователи не мешают друг другу '
+            'и получают ожидаемые коллекцией статусы ответов.'
+        )
+        assert 'неожиданных статусов: 6' in report
@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21QueryTiming:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_query_headers(self, admin_client):
+        from api.middleware import get_view_stats, reset_view_stats
+
+        reset_view_stats()
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get(self.TITLES_URL)
+        assert response['X-DB-Queries'] == str(len(queries)), (
+            'Проверьте, что заголовок `X-DB-Queries` содержит число '
+            'SQL-запросов, выполненных при обработке запроса.'
+        )
+        assert response['Server-Timing'].startswith('db;dur='), (
+            'Проверьте, что ответ содержит заголовок `Server-Timing` со '
+            'временем работы с базой данных.'
+        )
+        stats = get_view_stats()['TitleViewSet.list']
+        assert stats['requests'] == 1 and stats['queries'] == len(queries), (
+            'Проверьте, что статистика SQL-запросов собирается по '
+            'представлениям.'
+        )
+
+    def test_02_slow_request_logging(self, admin_client, settings, caplog):
+        settings.DB_TIMING_SLOW_QUERIES = 0
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            admin_client.get(self.TITLES_URL)
+        assert 'TitleViewSet.list' in caplog.text, (
+            'Проверьте, что запросы, превысившие порог числа SQL-запросов, '
+            'записываются в журнал.'
+        )
+
+    def test_03_disabled(self, settings):
+        from django.test import Client
+
+        settings.DB_TIMING_ENABLED = False
+        response = Client().get(self.TITLES_URL)
+        assert 'X-DB-Queries' not in response, (
+            'Проверьте, что при `DB_TIMING_ENABLED = False` заголовки не '
+            'добавляются.'
+        )
@@ -0,0 +1,42 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Profiling:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_profile_on_demand(self, admin_client, user_client, settings,
+                                  tmp_path):
+        settings.PROFILING_DIR = str(tmp_path)
+
+        response = user_client.get(self.TITLES_URL, HTTP_X_PROFILE='1')
+        assert 'X-Profile' not in response, (
+            'Проверьте, что заголовок `X-Profile` учитывается только в '
+            'запросах администратора.'
+        )
+        response = admin_client.get(self.TITLES_URL, HTTP_X_PROFILE='1')
+        assert response['X-Profile'].startswith('TitleViewSet.list'), (
+            'Проверьте, что профиль запроса администратора с заголовком '
+            '`X-Profile` сохраняется в каталог представления.'
+        )
+        assert (tmp_path / response['X-Profile']).exists()
+
+        settings.PROFILING_SAMPLE_RATE = 1
+        user_client.get(self.TITLES_URL)
+        assert len(list((tmp_path / 'TitleViewSet.list').iterdir())) == 2, (
+            'Проверьте, что при `PROFILING_SAMPLE_RATE = 1` профилируются '
+            'все запросы.'
+        )
+
+        out = StringIO()
+        call_command('aggregate_profiles', profile_dir=str(tmp_path),
+                     stdout=out)
+        assert 'TitleViewSet.list: профилей 2' in out.getvalue(), (
+            'Проверьте, что команда `aggregate_profiles` объединяет профили '
+            'по представлениям.'
+        )
+        assert (tmp_path / 'TitleViewSet.list.prof').exists()
@@ -0,0 +1,172 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.test import Client
+
+
+def get_sample(text, sample):
+    for line in text.splitlines():
+        if line.startswith(f'{sample} '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Metrics:
+
+    METRICS_URL = '/metrics'
+    TITLES_URL = '/api/v1/titles/'
+    REQUESTS = (
+        'yamdb_http_requests_total'
+        '{method="GET",route="titles-list",status="200"}'
+    )
+    LATENCY_COUNT = (
+        'yamdb_http_request_duration_seconds_count'
+        '{method="GET",route="titles-list"}'
+    )
+    LATENCY_INF = (
+        'yamdb_http_request_duration_seconds_bucket'
+        '{le="+Inf",method="GET",route="titles-list"}'
+    )
+
+    def get_metrics(self, client):
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == 200, (
+            f'Проверьте, что адрес `{self.METRICS_URL}` доступен.'
+        )
+        assert response['Content-Type'].startswith('text/plain'), (
+            'Проверьте, что метрики отдаются в текстовом формате Prometheus.'
+        )
+        return response.content.decode()
+
+    def test_01_request_metrics(self, client, admin_client):
+        before = self.get_metrics(admin_client)
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+        after = self.get_metrics(admin_client)
+        assert (
+            get_sample(after, self.REQUESTS)
+            - get_sample(before, self.REQUESTS) == 2
+        ), (
+            'Проверьте, что запросы считаются по маршруту, методу и статусу.'
+        )
+        assert (
+            get_sample(after, self.LATENCY_INF)
+            - get_sample(before, self.LATENCY_INF) == 2
+        ) and (
+            get_sample(after, self.LATENCY_COUNT)
+            - get_sample(before, self.LATENCY_COUNT) == 2
+        ), (
+            'Проверьте, что время ответа собирается в гистограмму по '
+            'маршруту.'
+        )
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in after
+        assert 'yamdb_db_queries_total{route="titles-list"}' in after, (
+            'Проверьте, что SQL-запросы считаются по маршрутам.'
+        )
+
+    def test_02_cache_metrics(self, admin_client):
+        client = Client()
+        hit = (
+            'yamdb_response_cache_requests_total'
+            '{namespace="titles",result="hit"}'
+        )
+        before = self.get_metrics(admin_client)
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+        after = self.get_metrics(admin_client)
+        assert get_sample(after, hit) - get_sample(before, hit) >= 1, (
+            'Проверьте, что попадания в кэш ответов учитываются в метриках.'
+        )
+
+    def test_03_multiprocess(self, client, admin_client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        settings.METRICS_FLUSH_INTERVAL = 3600
+        key = json.dumps([
+            'yamdb_http_requests_total',
+            [['method', 'GET'], ['route', 'titles-list'], ['status', 200]]
+        ])
+        before = get_sample(self.get_metrics(admin_client), self.REQUESTS)
+        finished = subprocess.Popen([sys.executable, '-c', ''])
+        finished.wait()
+        dead_path = tmp_path / f'{finished.pid}.json'
+        (tmp_path / f'{os.getppid()}.json').write_text(json.dumps({key: 5}))
+        dead_path.write_text(json.dumps({key: 100}))
+        client.get(self.TITLES_URL)
+        own = json.loads((tmp_path / f'{os.getpid()}.json').read_text())
+        assert own.get(key) == before + 1, (
+            'Проверьте, что процесс записывает значения в `METRICS_DIR` '
+            'после каждого запроса.'
+        )
+        text = self.get_metrics(admin_client)
+        assert get_sample(text, self.REQUESTS) - before == 106, (
+            'Проверьте, что при заданном `METRICS_DIR` метрики суммируются '
+            'по всем процессам, включая завершившиеся.'
+        )
+        assert not dead_path.exists(), (
+            'Проверьте, что значения завершившихся процессов переносятся '
+            'в архив.'
+        )
+        text = self.get_metrics(admin_client)
+        assert get_sample(text, self.REQUESTS) - before == 106, (
+            'Проверьте, что значения завершившихся процессов продолжают '
+            'учитываться.'
+        )
+
+    def test_04_disabled(self, admin_client, settings):
+        settings.METRICS_ENABLED = False
+        response = admin_client.get(self.METRICS_URL)
+        assert response.status_code == 404, (
+            'Проверьте, что при `METRICS_ENABLED = False` адрес метрик '
+            'недоступен.'
+        )
+
+    def test_05_access(self, client, user_client, settings):
+        for name, other_client in (('анонимному', client),
+                                   ('обычному', user_client)):
+            response = other_client.get(self.METRICS_URL)
+            assert response.status_code in (401, 403), (
+                f'Проверьте, что метрики недоступны {name} пользователю.'
+            )
+        settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+        self.get_metrics(client)
+
+    def test_06_process_exit(self, admin_client, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        before = get_sample(self.get_metrics(admin_client), self.REQUESTS)
+        worker = subprocess.Popen(
+            [sys.executable, '-c', (
+                'import sys, django; django.setup(); '
+                'from api import metrics; '
+                'metrics.inc(metrics.HTTP_REQUESTS, {"method": "GET", '
+                '"route": "titles-list", "status": 200}, 3); '
+                'metrics.flush(); print(flush=True); sys.stdin.read()'
+            )],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings',
+                'METRICS_DIR': str(tmp_path),
+            },
+        )
+        worker.stdout.readline()
+        running = get_sample(self.get_metrics(admin_client), self.REQUESTS)
+        assert running - before == 3, (
+            'Проверьте, что учитываются значения работающих процессов.'
+        )
+        worker.communicate()
+        assert worker.returncode == 0
+        finished = get_sample(self.get_metrics(admin_client), self.REQUESTS)
+        assert finished == running, (
+            'Проверьте, что счётчики не уменьшаются после завершения '
+            'процесса.'
+        )
+        assert not (tmp_path / f'{worker.pid}.json').exists(), (
+            'Проверьте, что завершившийся процесс переносит свои значения '
+            'в архив.'
+        )
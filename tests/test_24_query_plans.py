@@ -0,0 +1,49 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24QueryPlans:
+
+    def test_01_nested_lists_use_indexes(self, admin_client, admin,
+                                         user_client, user):
+        from reviews.models import Comment, Review
+
+        create_comments(admin_client, {admin: admin_client, user: user_client})
+        index_names = {
+            index.name
+            for model in (Review, Comment) for index in model._meta.indexes
+        }
+        assert {
+            'review_title_pub_date_id_idx', 'review_author_title_idx',
+            'comment_review_pub_date_id_idx'
+        } <= index_names, (
+            'Проверьте, что для списков отзывов и комментариев заданы '
+            'составные индексы.'
+        )
+        out = StringIO()
+        call_command('check_query_plans', show_plans=True, stdout=out)
+        output = out.getvalue()
+        assert 'review_title_pub_date_id_idx' in output, (
+            'Проверьте, что список отзывов произведения выбирается и '
+            'сортируется по составному индексу.'
+        )
+        assert 'comment_review_pub_date_id_idx' in output, (
+            'Проверьте, что список комментариев отзыва выбирается и '
+            'сортируется по составному индексу.'
+        )
+        assert 'все используют индексы' in output
+
+    def test_02_detects_temp_btree_sort(self):
+        from api.management.commands.check_query_plans import (explain,
+                                                               find_problems)
+        from reviews.models import Comment
+
+        sql, params = Comment.objects.order_by('text').query.sql_with_params()
+        assert find_problems(sql, explain(sql, params)), (
+            'Проверьте, что полный просмотр таблицы и сортировка во '
+            'временном B-дереве считаются ошибкой плана.'
+        )
@@ -0,0 +1,121 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Counters:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_counts(self, client, title_id, review_id):
+        title = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        review = client.get(self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        ))
+        assert review.status_code == HTTPStatus.OK
+        return title.json()['reviews_count'], review.json()['comments_count']
+
+    def test_01_counters_follow_children(self, client, admin_client, admin,
+                                         user_client, user, moderator_client,
+                                         moderator):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        assert self.get_counts(client, title_id, review_id) == (3, 3), (
+            'Проверьте, что ответы содержат число отзывов произведения '
+            '`reviews_count` и число комментариев отзыва `comments_count`.'
+        )
+
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=review_id
+        )
+        admin_client.delete(f'{review_url}comments/{comments[0]["id"]}/')
+        assert self.get_counts(client, title_id, review_id) == (3, 2), (
+            'Проверьте, что удаление комментария уменьшает `comments_count`.'
+        )
+
+        admin_client.patch(review_url, data={'text': 'Изменённый отзыв'})
+        user.delete()
+        assert self.get_counts(client, title_id, review_id) == (2, 1), (
+            'Проверьте, что при удалении пользователя его отзывы и '
+            'комментарии исключаются из счётчиков.'
+        )
+
+    def test_02_reconcile(self, admin_client, admin, user_client, user):
+        from reviews.models import Review, Title
+
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        review = Review.objects.get(pk=reviews[0]['id'])
+        Review.objects.update(comments_count=0)
+        review.text = 'Сохранение загруженного объекта'
+        review.save()
+        assert Review.objects.get(pk=review.pk).comments_count == 0, (
+            'Проверьте, что сохранение отзыва не перезаписывает счётчик '
+            'комментариев загруженным значением.'
+        )
+        Title.objects.update(rating_count=0)
+
+        call_command('update_ratings')
+        assert Review.objects.get(pk=review.pk).comments_count == 2, (
+            'Проверьте, что команда `update_ratings` пересчитывает число '
+            'комментариев отзывов.'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).rating_count == 2
+
+    def test_03_cascade_without_per_comment_queries(self, client,
+                                                     admin_client, admin,
+                                                     user_client, user):
+        from reviews.models import Comment, Review
+
+        _, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        review = Review.objects.get(pk=reviews[1]['id'])
+        for idx in range(20):
+            Comment.objects.create(
+                review=review, author=admin, text=f'Комментарий {idx}'
+            )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(reviews_url)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            admin.delete()
+        review_selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        assert len(review_selects) <= 3, (
+            'Проверьте, что при каскадном удалении комментариев отзывы '
+            'не загружаются для каждого комментария отдельно.'
+        )
+        assert len(updates) == 2, (
+            'Проверьте, что при удалении пользователя счётчики комментариев '
+            'отзывов обновляются одним запросом, а не на каждый комментарий '
+            '(второй запрос - рейтинг произведения его отзыва).'
+        )
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление комментариев меняет `ETag` списка '
+            'отзывов произведения.'
+        )
+        assert response.json()['results'][0]['comments_count'] == 0
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class FailingEmailBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise SMTPException('Почтовый сервер недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def sign_up(self, client, count):
+        for idx in range(count):
+            response = client.post(self.URL_SIGNUP, data={
+                'username': f'outbox_{idx}',
+                'email': f'outbox_{idx}@yamdb.fake'
+            })
+            assert response.status_code == HTTPStatus.OK
+
+    def send_emails(self, **options):
+        out = StringIO()
+        call_command('send_emails', once=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_01_batches_over_one_connection(self, client, settings,
+                                            tmp_path):
+        from reviews.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        self.sign_up(client, 3)
+        assert OutgoingEmail.objects.count() == 3, (
+            f'Проверьте, что POST-запрос к `{self.URL_SIGNUP}` ставит '
+            'письмо с кодом подтверждения в очередь.'
+        )
+
+        output = self.send_emails(batch_size=3)
+        assert 'Отправлено: 3' in output and 'в очереди: 0' in output, (
+            'Проверьте, что команда `send_emails` отправляет письма из '
+            'очереди и выводит её длину.'
+        )
+        assert not OutgoingEmail.objects.exists()
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1 and files[0].read_text().count(
+            'Subject:'
+        ) == 3, (
+            'Проверьте, что пачка писем отправляется через одно соединение '
+            'с почтовым сервером.'
+        )
+
+    def test_02_retry_with_backoff(self, client, settings):
+        from reviews.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_26_outbox.FailingEmailBackend'
+        self.sign_up(client, 1)
+        output = self.send_emails(max_attempts=2)
+        email = OutgoingEmail.objects.get()
+        assert 'ошибок: 1' in output and email.attempts == 1, (
+            'Проверьте, что неотправленное письмо остаётся в очереди.'
+        )
+        assert email.send_after > timezone.now() + timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY - 5
+        ) and 'недоступен' in email.last_error, (
+            'Проверьте, что повторная отправка откладывается с задержкой.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        output = self.send_emails(max_attempts=2)
+        email = OutgoingEmail.objects.get()
+        assert email.send_after - timezone.now() > timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 1.5
+        ), (
+            'Проверьте, что задержка повторной отправки растёт с каждой '
+            'попыткой.'
+        )
+        assert 'исчерпали попытки: 1' in output, (
+            'Проверьте, что после `--max-attempts` попыток письмо больше '
+            'не отправляется.'
+        )
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        outbox_before_count = len(mail.outbox)
+        self.send_emails(max_attempts=2)
+        assert len(mail.outbox) == outbox_before_count
+
+    def test_03_claim_skips_emails_taken_by_other_worker(self, client):
+        from django.db import connection
+
+        from api.management.commands.send_emails import claim_batch
+        from reviews.models import OutgoingEmail
+
+        self.sign_up(client, 3)
+        taken = OutgoingEmail.objects.order_by('id').first()
+        claimed = []
+
+        def other_worker_claims(execute, sql, params, many, context):
+            if sql.startswith('UPDATE') and not claimed:
+                claimed.append(taken.pk)
+                OutgoingEmail.objects.filter(pk=taken.pk).update(
+                    send_after=timezone.now() + timedelta(minutes=5)
+                )
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(other_worker_claims):
+            emails = claim_batch(batch_size=3, max_attempts=5)
+        assert sorted(email.pk for email in emails) == sorted(
+            OutgoingEmail.objects.exclude(pk=taken.pk).values_list(
+                'pk', flat=True
+            )
+        ), (
+            'Проверьте, что команда `send_emails` не забирает письма, '
+            'которые уже забрал другой экземпляр команды.'
+        )
+        assert claim_batch(batch_size=3, max_attempts=5) == [], (
+            'Проверьте, что забранные письма не отдаются повторно до '
+            'истечения срока аренды.'
+        )